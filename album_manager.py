@@ -1,17 +1,27 @@
 """Album management for Google Photos backup tool"""
 
 import logging
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from typing import Dict, Optional, List, Tuple
 from googleapiclient.errors import HttpError
 import time
 
-from config import sanitize_album_name, MAX_RETRIES, RETRY_DELAY, BACKOFF_FACTOR
+from config import sanitize_album_name, MAX_RETRIES, BACKOFF_SCHEDULE
+from rate_limiter import TokenBucket
 from state_manager import BackupState
 from quota_tracker import QuotaTracker
 from safe_logging import safe_log
 
 logger = logging.getLogger(__name__)
 
+# How long a persisted album listing stays valid before we re-fetch it.
+# Only this app can touch its albums, so staleness risk is low.
+ALBUMS_CACHE_TTL = 3600  # seconds
+
 class AlbumExistsAction:
     """Actions to take when an album already exists"""
     SKIP = "skip"
@@ -21,54 +31,127 @@ class AlbumExistsAction:
 class AlbumManager:
     """Manages Google Photos albums"""
     
-    def __init__(self, service, state: BackupState, quota_tracker: QuotaTracker):
+    def __init__(self, service, state: BackupState, quota_tracker: QuotaTracker,
+                 bucket: Optional[TokenBucket] = None):
         self.service = service
         self.state = state
         self.quota = quota_tracker
+        # Shared pacer (injectable so other API clients can use the same one)
+        self._bucket = bucket or TokenBucket()
         self._albums_cache: Optional[Dict[str, str]] = None  # {album_title: album_id}
         self._albums_cache_loaded = False
-    
+        # Memoized negative lookups so repeated existence checks for
+        # not-yet-created albums don't re-walk state and the cache
+        self._known_missing: set = set()
+        # Serializes get_or_create_album so concurrent uploads can't race
+        # into creating duplicate albums
+        self._create_lock = threading.Lock()
+
+    def _sleep_backoff(self, attempt: int) -> float:
+        """
+        Sleep with half-jittered exponential backoff.
+        Jitter prevents concurrent backup sessions from retrying in lockstep.
+        Returns the number of seconds slept.
+        """
+        base = BACKOFF_SCHEDULE[min(attempt, len(BACKOFF_SCHEDULE) - 1)]
+        wait_time = random.uniform(base * 0.5, base)
+        logger.debug(f"Backing off {wait_time:.1f}s (attempt {attempt + 1})")
+        time.sleep(wait_time)
+        return wait_time
+
+    def _retry_after_seconds(self, http_error: HttpError) -> Optional[float]:
+        """
+        Parse the Retry-After header from a rate-limited response.
+        Handles both delta-seconds and HTTP-date forms.
+        Returns seconds to wait, or None if the header is absent/unparseable.
+        """
+        retry_after = http_error.resp.get('retry-after') or http_error.resp.get('Retry-After')
+        if not retry_after:
+            return None
+
+        try:
+            return max(0.0, float(retry_after))
+        except (TypeError, ValueError):
+            pass
+
+        try:
+            retry_at = parsedate_to_datetime(retry_after)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    def _handle_429(self, attempt: int, http_error: HttpError) -> float:
+        """
+        Sleep after a 429 response. Honors the server-provided Retry-After
+        header when present (sleeping less wastes a quota unit on a
+        guaranteed-fail retry; sleeping more wastes wall time), otherwise
+        falls back to jittered exponential backoff.
+        Returns the number of seconds slept.
+        """
+        # Tell the pacer to slow down so future calls avoid the same 429
+        self._bucket.on_rate_limited()
+
+        wait_time = self._retry_after_seconds(http_error)
+        if wait_time is not None:
+            logger.warning(f"Server requested Retry-After {wait_time:.0f}s, waiting...")
+            time.sleep(wait_time)
+            return wait_time
+
+        return self._sleep_backoff(attempt)
+
     def load_existing_albums(self) -> bool:
         """
         Load albums created by this app from Google Photos.
+        This is the only place the listing endpoint is paged (at the API
+        max page size); every later existence check is a dict lookup and
+        creations write straight back into the cache, so a run never
+        re-lists except after a 409 invalidation.
         Note: Can only access albums created by this app due to API restrictions.
         Returns True if successful, False if quota exceeded.
         """
         if self._albums_cache_loaded:
             return True
-        
+
+        # Warm start: reuse the listing persisted in state if it's fresh enough
+        cached = self.state.get_albums_cache()
+        if cached is not None:
+            albums, fetched_at = cached
+            age = time.time() - fetched_at
+            if 0 <= age < ALBUMS_CACHE_TTL:
+                self._albums_cache = dict(albums)
+                self._albums_cache_loaded = True
+                logger.info(f"Loaded {len(albums)} albums from cached state "
+                            f"({age:.0f}s old, no API calls)")
+                return True
+
         try:
             logger.info("Loading app-created albums from Google Photos...")
-            
-            # Check quota first
-            can_perform, reason = self.quota.can_perform_operation("list_albums", estimated_albums=100)
-            if not can_perform:
-                logger.error(f"Cannot list albums: {reason}")
-                return False
-            
+
             albums = {}
-            next_page_token = None
             page_count = 0
-            
+
+            # 50 is the documented maximum pageSize for albums().list;
+            # hoisted out of the loop, only the pageToken changes per page
+            list_kwargs = {'pageSize': 50}
+
             while True:
                 # Check quota before each request
                 if not self.quota.can_make_requests(1):
                     logger.error("Quota exhausted while loading albums")
                     return False
-                
+
                 try:
-                    request_body = {'pageSize': 50}
-                    if next_page_token:
-                        request_body['pageToken'] = next_page_token
-                    
-                    response = self.service.albums().list(**request_body).execute()
-                    
+                    self._bucket.acquire()
+                    response = self.service.albums().list(**list_kwargs).execute()
+                    self._bucket.on_success()
+
                     if not self.quota.record_requests(1):
                         logger.error("Quota exhausted after listing albums")
                         return False
                     
                     page_count += 1
-                    logger.debug(f"Loaded albums page {page_count}")
+                    logger.debug(f"Loaded albums page {page_count} "
+                                 f"({len(response.get('albums', []))} albums)")
                     
                     # Process albums from this page
                     if 'albums' in response:
@@ -76,17 +159,21 @@ class AlbumManager:
                             album_title = album.get('title', '')
                             album_id = album.get('id', '')
                             if album_title and album_id:
-                                albums[album_title] = album_id
+                                # Intern: the same titles/IDs also live in
+                                # BackupState and log lines, so dedupe the
+                                # string objects on large accounts
+                                albums[sys.intern(album_title)] = sys.intern(album_id)
                     
                     # Check if there are more pages
                     next_page_token = response.get('nextPageToken')
                     if not next_page_token:
                         break
+                    list_kwargs['pageToken'] = next_page_token
                 
                 except HttpError as e:
                     if e.resp.status == 429:  # Rate limit
                         logger.warning("Rate limited while loading albums, waiting...")
-                        time.sleep(RETRY_DELAY)
+                        self._handle_429(0, e)
                         continue
                     elif e.resp.status == 403:
                         # With new API restrictions, 403 can mean no app-created albums exist yet
@@ -102,7 +189,8 @@ class AlbumManager:
             
             self._albums_cache = albums
             self._albums_cache_loaded = True
-            
+            self.state.set_albums_cache(albums, time.time())
+
             logger.info(f"Loaded {len(albums)} existing albums")
             return True
             
@@ -110,6 +198,18 @@ class AlbumManager:
             logger.error(f"Failed to load existing albums: {e}")
             return False
     
+    def _lookup_album_id(self, name: str) -> Optional[str]:
+        """
+        Two-layer lookup: albums created by this backup (state keys them
+        case/whitespace-insensitively) first, then the server-side
+        listing cache keyed by exact title. One dict probe per layer,
+        no copies.
+        """
+        album_id = self.state.get_album_id(name)
+        if album_id is None and self._albums_cache:
+            album_id = self._albums_cache.get(name)
+        return album_id
+
     def get_existing_albums(self) -> Dict[str, str]:
         """Get cached existing albums"""
         if not self._albums_cache_loaded:
@@ -121,17 +221,26 @@ class AlbumManager:
     def album_exists(self, album_name: str) -> Tuple[bool, Optional[str]]:
         """
         Check if an album exists.
+        Keys by the sanitized name so callers passing raw directory names
+        hit the same entries as get_or_create_album.
         Returns (exists, album_id_if_exists)
         """
-        # First check our created albums cache
-        album_id = self.state.get_album_id(album_name)
-        if album_id:
-            return True, album_id
-        
-        # Then check existing albums from Google Photos
-        existing_albums = self.get_existing_albums()
-        album_id = existing_albums.get(album_name)
-        
+        name = sanitize_album_name(album_name)
+
+        if name in self._known_missing:
+            return False, None
+
+        album_id = self._lookup_album_id(name)
+
+        # On a miss, make sure the server-side cache has been loaded at
+        # least once before concluding the album doesn't exist
+        if album_id is None and not self._albums_cache_loaded:
+            if self.load_existing_albums():
+                album_id = self._lookup_album_id(name)
+
+        if album_id is None:
+            self._known_missing.add(name)
+
         return album_id is not None, album_id
     
     def create_album(self, album_name: str, retries: int = MAX_RETRIES) -> Optional[str]:
@@ -161,8 +270,11 @@ class AlbumManager:
                     }
                 }
                 
+                self.quota.acquire()
+                self._bucket.acquire()
                 response = self.service.albums().create(body=request_body).execute()
-                
+                self._bucket.on_success()
+
                 if not self.quota.record_requests(1):
                     logger.error("Quota exhausted after creating album")
                     return None
@@ -173,9 +285,11 @@ class AlbumManager:
                     
                     # Cache the created album
                     self.state.add_created_album(sanitized_name, album_id)
+                    self.state.add_album_to_cache(sanitized_name, album_id)
                     if self._albums_cache is not None:
                         self._albums_cache[sanitized_name] = album_id
-                    
+                    self._known_missing.discard(sanitized_name)
+
                     return album_id
                 else:
                     logger.error(f"No album ID in response: {response}")
@@ -183,11 +297,14 @@ class AlbumManager:
                 
             except HttpError as e:
                 if e.resp.status == 429:  # Rate limit
-                    wait_time = RETRY_DELAY * (BACKOFF_FACTOR ** attempt)
-                    logger.warning(f"Rate limited creating album, waiting {wait_time}s...")
-                    time.sleep(wait_time)
+                    logger.warning("Rate limited creating album, backing off...")
+                    self._handle_429(attempt, e)
                 elif e.resp.status == 409:  # Conflict - album might already exist
                     safe_log('warning', f"Album '{sanitized_name}' might already exist")
+                    # Our cached listing missed it, so force a server refresh
+                    self.state.clear_albums_cache()
+                    self._albums_cache_loaded = False
+                    self._known_missing.discard(sanitized_name)
                     # Try to find it
                     exists, album_id = self.album_exists(sanitized_name)
                     if exists and album_id:
@@ -200,58 +317,59 @@ class AlbumManager:
                 else:
                     safe_log('error', f"HTTP error creating album '{sanitized_name}': {e}")
                     if attempt < retries:
-                        wait_time = RETRY_DELAY * (BACKOFF_FACTOR ** attempt)
-                        time.sleep(wait_time)
+                        self._sleep_backoff(attempt)
                     else:
                         return None
-                        
+
             except Exception as e:
                 safe_log('error', f"Unexpected error creating album '{sanitized_name}': {e}")
                 if attempt < retries:
-                    wait_time = RETRY_DELAY * (BACKOFF_FACTOR ** attempt)
-                    time.sleep(wait_time)
+                    self._sleep_backoff(attempt)
                 else:
                     return None
         
         safe_log('error', f"Failed to create album '{sanitized_name}' after {retries + 1} attempts")
         return None
     
-    def get_or_create_album(self, album_name: str, 
+    def get_or_create_album(self, album_name: str,
                            exists_action: str = AlbumExistsAction.STOP) -> Tuple[Optional[str], bool]:
         """
         Get existing album or create new one based on policy.
+        Serialized by a lock so concurrent workers can't both miss the
+        existence check and create duplicates.
         Returns (album_id, created_new)
         """
         sanitized_name = sanitize_album_name(album_name)
-        
+
         if not sanitized_name:
             safe_log('error', f"Invalid album name: '{album_name}'")
             return None, False
-        
-        # Check if album exists
-        exists, album_id = self.album_exists(sanitized_name)
-        
-        if exists and album_id:
-            safe_log('info', f"Album '{sanitized_name}' already exists (ID: {album_id})")
-            
-            if exists_action == AlbumExistsAction.SKIP:
-                safe_log('info', f"Skipping existing album: '{sanitized_name}'")
-                return None, False
-            elif exists_action == AlbumExistsAction.MERGE:
-                safe_log('info', f"Using existing album: '{sanitized_name}'")
-                # Make sure it's in our state
-                self.state.add_created_album(sanitized_name, album_id)
-                return album_id, False
-            else:  # STOP
-                safe_log('error', f"Album '{sanitized_name}' already exists. Use --skip-existing or --merge-existing flags.")
-                return None, False
-        else:
-            # Album doesn't exist, create it
-            album_id = self.create_album(sanitized_name)
-            if album_id:
-                return album_id, True
+
+        with self._create_lock:
+            # Check if album exists
+            exists, album_id = self.album_exists(sanitized_name)
+
+            if exists and album_id:
+                safe_log('info', f"Album '{sanitized_name}' already exists (ID: {album_id})")
+
+                if exists_action == AlbumExistsAction.SKIP:
+                    safe_log('info', f"Skipping existing album: '{sanitized_name}'")
+                    return None, False
+                elif exists_action == AlbumExistsAction.MERGE:
+                    safe_log('info', f"Using existing album: '{sanitized_name}'")
+                    # Make sure it's in our state
+                    self.state.add_created_album(sanitized_name, album_id)
+                    return album_id, False
+                else:  # STOP
+                    safe_log('error', f"Album '{sanitized_name}' already exists. Use --skip-existing or --merge-existing flags.")
+                    return None, False
             else:
-                return None, False
+                # Album doesn't exist, create it
+                album_id = self.create_album(sanitized_name)
+                if album_id:
+                    return album_id, True
+                else:
+                    return None, False
     
     def add_media_to_album(self, album_id: str, media_item_ids: List[str], 
                           retries: int = MAX_RETRIES) -> bool:
@@ -277,25 +395,44 @@ class AlbumManager:
                     'mediaItemIds': media_item_ids
                 }
                 
+                self.quota.acquire()
+                self._bucket.acquire()
                 response = self.service.albums().batchAddMediaItems(
-                    albumId=album_id, 
+                    albumId=album_id,
                     body=request_body
                 ).execute()
-                
+                self._bucket.on_success()
+
                 if not self.quota.record_requests(1):
                     logger.error("Quota exhausted after adding media to album")
                     return False
                 
                 # Check for any errors in the response
-                if 'newMediaItemResults' in response:
+                item_results = response.get('newMediaItemResults', ())
+                if item_results:
+                    # Happy path: every item succeeded, skip the per-item
+                    # bookkeeping entirely
+                    if all(r.get('status', {}).get('code', 0) == 0 for r in item_results):
+                        logger.info(f"Successfully added {len(media_item_ids)} media items to album")
+                        return True
+
                     success_count = 0
-                    for result in response['newMediaItemResults']:
+                    failures: Dict[str, int] = {}  # {error_message: count}
+                    for result in item_results:
                         if result.get('status', {}).get('code') == 0:  # SUCCESS
                             success_count += 1
                         else:
                             error_msg = result.get('status', {}).get('message', 'Unknown error')
-                            logger.warning(f"Failed to add media item: {error_msg}")
-                    
+                            failures[error_msg] = failures.get(error_msg, 0) + 1
+                            # Per-item detail only when debugging; one aggregate
+                            # warning below covers the batch
+                            if logger.isEnabledFor(logging.DEBUG):
+                                logger.debug(f"Failed to add media item: {error_msg}")
+
+                    if failures:
+                        logger.warning(f"Batch add: {success_count}/{len(media_item_ids)} ok; "
+                                       f"failures: {failures}")
+
                     if success_count > 0:
                         logger.info(f"Successfully added {success_count}/{len(media_item_ids)} media items to album")
                         return success_count == len(media_item_ids)
@@ -305,43 +442,48 @@ class AlbumManager:
                 
             except HttpError as e:
                 if e.resp.status == 429:  # Rate limit
-                    wait_time = RETRY_DELAY * (BACKOFF_FACTOR ** attempt)
-                    logger.warning(f"Rate limited adding media to album, waiting {wait_time}s...")
-                    time.sleep(wait_time)
+                    logger.warning("Rate limited adding media to album, backing off...")
+                    self._handle_429(attempt, e)
                 else:
                     logger.error(f"HTTP error adding media to album: {e}")
                     if attempt < retries:
-                        wait_time = RETRY_DELAY * (BACKOFF_FACTOR ** attempt)
-                        time.sleep(wait_time)
+                        self._sleep_backoff(attempt)
                     else:
                         return False
-                        
+
             except Exception as e:
                 logger.error(f"Unexpected error adding media to album: {e}")
                 if attempt < retries:
-                    wait_time = RETRY_DELAY * (BACKOFF_FACTOR ** attempt)
-                    time.sleep(wait_time)
+                    self._sleep_backoff(attempt)
                 else:
                     return False
         
         logger.error(f"Failed to add media to album after {retries + 1} attempts")
         return False
     
-    def get_albums_summary(self) -> str:
-        """Get human-readable summary of albums"""
+    def get_albums_summary(self, include_existing: bool = False) -> str:
+        """
+        Get human-readable summary of albums.
+        Only reports server-side totals when the cache is already warm or
+        include_existing is set — a summary should never spend quota on a
+        paginated album load by itself.
+        """
         created_albums = self.state.get_created_albums()
-        existing_albums = self.get_existing_albums()
-        
+
         lines = [
             f"📁 Album Summary:",
-            f"   Created in this backup: {len(created_albums)}",
-            f"   Total existing albums: {len(existing_albums)}"
+            f"   Created in this backup: {len(created_albums)}"
         ]
-        
+
+        if self._albums_cache_loaded:
+            lines.append(f"   Total existing albums: {len(self._albums_cache or {})}")
+        elif include_existing:
+            lines.append(f"   Total existing albums: {len(self.get_existing_albums())}")
+
         if created_albums:
             lines.append("   Albums created:")
-            for name, album_id in created_albums.items():
-                lines.append(f"     • {name} ({album_id})")
+            for display_name, album_id in created_albums.values():
+                lines.append(f"     • {display_name} ({album_id})")
         
         return "\n".join(lines)
 
@@ -370,7 +512,7 @@ if __name__ == "__main__":
     print("Loading existing albums...")
     if album_mgr.load_existing_albums():
         print("✅ Albums loaded successfully")
-        print(album_mgr.get_albums_summary())
+        print(album_mgr.get_albums_summary(include_existing=True))
     else:
         print("❌ Failed to load albums")
     
@@ -1,22 +1,28 @@
 """Authentication module for Google Photos API"""
 
 import os
-import pickle
+import time
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
 from googleapiclient.errors import HttpError
 import logging
+import requests
 from typing import Optional
 
 from config import (
-    SCOPES, CREDENTIALS_FILE, TOKEN_FILE, API_SERVICE_NAME, 
-    API_VERSION, DISCOVERY_SERVICE_URL
+    SCOPES, CREDENTIALS_FILE, TOKEN_FILE, API_SERVICE_NAME,
+    API_VERSION, DISCOVERY_SERVICE_URL, STATE_DIR
 )
 
 logger = logging.getLogger(__name__)
 
+# Discovery documents are effectively static per API version, so cache the
+# JSON on disk and skip one HTTPS round-trip on every process start
+DISCOVERY_CACHE_FILE = os.path.join(STATE_DIR, 'photoslibrary_v1_discovery.json')
+DISCOVERY_CACHE_MAX_AGE = 7 * 24 * 3600  # refresh weekly
+
 class GooglePhotosAuth:
     """Handle Google Photos API authentication"""
     
@@ -30,21 +36,24 @@ class GooglePhotosAuth:
         Returns True if authentication successful, False otherwise.
         """
         try:
+            creds_changed = False
+
             # Load existing credentials
             if os.path.exists(TOKEN_FILE):
                 logger.info("Loading existing credentials...")
                 self.credentials = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
-            
+
             # If there are no valid credentials available, request authorization
             if not self.credentials or not self.credentials.valid:
                 if self.credentials and self.credentials.expired and self.credentials.refresh_token:
                     logger.info("Refreshing expired credentials...")
                     try:
                         self.credentials.refresh(Request())
+                        creds_changed = True
                     except Exception as e:
                         logger.warning(f"Failed to refresh credentials: {e}")
                         self.credentials = None
-                
+
                 # If refresh failed or no credentials, get new ones
                 if not self.credentials:
                     logger.info("Requesting new credentials...")
@@ -52,16 +61,21 @@ class GooglePhotosAuth:
                         logger.error(f"Credentials file not found: {CREDENTIALS_FILE}")
                         logger.error("Please follow setup_credentials.md to create this file.")
                         return False
-                    
+
                     flow = InstalledAppFlow.from_client_secrets_file(
                         CREDENTIALS_FILE, SCOPES
                     )
                     self.credentials = flow.run_local_server(port=0)
-            
-            # Save the credentials for next time
-            with open(TOKEN_FILE, 'w') as token:
-                token.write(self.credentials.to_json())
-            
+                    creds_changed = True
+
+            # Save the credentials only when they actually changed; warm runs
+            # with a valid cached token skip the disk write entirely
+            if creds_changed:
+                with open(TOKEN_FILE, 'w') as token:
+                    token.write(self.credentials.to_json())
+                    token.flush()
+                    os.fsync(token.fileno())
+
             logger.info("Authentication successful!")
             return True
             
@@ -69,22 +83,81 @@ class GooglePhotosAuth:
             logger.error(f"Authentication failed: {e}")
             return False
     
+    def _get_discovery_doc(self) -> Optional[str]:
+        """
+        Get the API discovery document, preferring the on-disk cache.
+        Returns the document JSON, or None if it must be fetched by build().
+        """
+        try:
+            if os.path.exists(DISCOVERY_CACHE_FILE):
+                age = time.time() - os.path.getmtime(DISCOVERY_CACHE_FILE)
+                if age < DISCOVERY_CACHE_MAX_AGE:
+                    with open(DISCOVERY_CACHE_FILE, 'r', encoding='utf-8') as f:
+                        logger.debug("Using cached discovery document")
+                        return f.read()
+        except OSError as e:
+            logger.debug(f"Could not read cached discovery document: {e}")
+
+        try:
+            url = f"{DISCOVERY_SERVICE_URL}?version={API_VERSION}"
+            response = requests.get(url, timeout=30)
+            response.raise_for_status()
+            doc = response.text
+
+            # Cache for next run; failure to cache is not fatal. Write to
+            # a temp file and rename so a crash mid-write can't leave a
+            # truncated doc that passes the freshness check above
+            try:
+                os.makedirs(STATE_DIR, exist_ok=True)
+                temp_file = DISCOVERY_CACHE_FILE + '.tmp'
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    f.write(doc)
+                os.replace(temp_file, DISCOVERY_CACHE_FILE)
+            except OSError as e:
+                logger.debug(f"Could not cache discovery document: {e}")
+
+            return doc
+
+        except Exception as e:
+            logger.warning(f"Failed to fetch discovery document: {e}")
+            return None
+
     def build_service(self):
         """Build and return the Google Photos API service object"""
         if not self.credentials:
             raise Exception("Not authenticated. Call authenticate() first.")
-        
+
         try:
-            self.service = build(
-                API_SERVICE_NAME, 
-                API_VERSION, 
-                credentials=self.credentials,
-                discoveryServiceUrl=DISCOVERY_SERVICE_URL,
-                cache_discovery=False
-            )
+            discovery_doc = self._get_discovery_doc()
+            if discovery_doc:
+                try:
+                    self.service = build_from_document(
+                        discovery_doc,
+                        credentials=self.credentials
+                    )
+                except Exception as e:
+                    # A bad cached doc (e.g. truncated by an old crash)
+                    # shouldn't take the service down until it expires —
+                    # drop it and let build() fetch a fresh one
+                    logger.warning(f"Cached discovery document unusable, refetching: {e}")
+                    try:
+                        os.remove(DISCOVERY_CACHE_FILE)
+                    except OSError:
+                        pass
+                    discovery_doc = None
+
+            if not discovery_doc:
+                # Fall back to letting the client library fetch the document
+                self.service = build(
+                    API_SERVICE_NAME,
+                    API_VERSION,
+                    credentials=self.credentials,
+                    discoveryServiceUrl=DISCOVERY_SERVICE_URL,
+                    cache_discovery=False
+                )
             logger.info("Google Photos API service initialized")
             return self.service
-            
+
         except Exception as e:
             logger.error(f"Failed to build service: {e}")
             raise
@@ -110,7 +183,9 @@ class GooglePhotosAuth:
                 # Try to list albums created by this app (may be empty)
                 try:
                     result = service.albums().list(pageSize=1).execute()
-                    logger.info(f"Can access albums API (found {result.get('albums', []).__len__()} app-created albums)")
+                    # 'or ()' avoids allocating a fresh list when the key is absent
+                    album_count = len(result.get('albums') or ())
+                    logger.info(f"Can access albums API (found {album_count} app-created albums)")
                 except HttpError as e:
                     # 403 is expected if no albums created yet by this app
                     if e.resp.status == 403:
@@ -136,7 +211,6 @@ class GooglePhotosAuth:
             if self.credentials:
                 # Revoke the credentials
                 revoke_url = f'https://oauth2.googleapis.com/revoke?token={self.credentials.token}'
-                import requests
                 response = requests.post(revoke_url)
                 if response.status_code == 200:
                     logger.info("Credentials revoked successfully")
@@ -1,6 +1,7 @@
 """Configuration constants for Google Photos Backup Tool"""
 
 import os
+import re
 
 # OAuth 2.0 Configuration
 SCOPES = [
@@ -18,36 +19,47 @@ DISCOVERY_SERVICE_URL = 'https://photoslibrary.googleapis.com/$discovery/rest'
 # Quota Management
 DEFAULT_MAX_REQUESTS_PER_SESSION = 9500
 DEFAULT_MAX_DAILY_REQUESTS = 10000
+DEFAULT_MAX_WRITES_PER_MINUTE = 75  # Library API WritesPerMinutePerUser limit
 REQUEST_SAFETY_BUFFER = 500
 
 # File Size Limits (in bytes)
 MAX_PHOTO_SIZE = 200 * 1024 * 1024  # 200MB
 MAX_VIDEO_SIZE = 10 * 1024 * 1024 * 1024  # 10GB
 
-# Supported File Formats
-SUPPORTED_IMAGE_FORMATS = {
-    '.jpg', '.jpeg', '.png', '.gif', '.bmp', 
+# Supported File Formats (frozen: these are constants, and frozenset
+# membership checks are marginally cheaper in the per-file scan loop)
+SUPPORTED_IMAGE_FORMATS = frozenset({
+    '.jpg', '.jpeg', '.png', '.gif', '.bmp',
     '.heic', '.heif', '.webp'
-}
+})
 
-SUPPORTED_VIDEO_FORMATS = {
-    '.mp4', '.mov', '.avi', '.mkv', '.m4v', 
+SUPPORTED_VIDEO_FORMATS = frozenset({
+    '.mp4', '.mov', '.avi', '.mkv', '.m4v',
     '.webm', '.3gp'
-}
+})
 
 SUPPORTED_FORMATS = SUPPORTED_IMAGE_FORMATS | SUPPORTED_VIDEO_FORMATS
 
 # Upload Configuration
 UPLOAD_CHUNK_SIZE = 10 * 1024 * 1024  # 10MB chunks for large files
+MEDIA_BATCH_SIZE = 50  # mediaItems.batchCreate accepts up to 50 items per call
 MAX_RETRIES = 3
 RETRY_DELAY = 2  # seconds
 BACKOFF_FACTOR = 2
+MAX_BACKOFF_DELAY = 30  # seconds
+
+# Precomputed backoff delays indexed by attempt number, capped so a long
+# retry chain never sleeps more than MAX_BACKOFF_DELAY at a stretch
+BACKOFF_SCHEDULE = tuple(
+    min(MAX_BACKOFF_DELAY, RETRY_DELAY * (BACKOFF_FACTOR ** i))
+    for i in range(MAX_RETRIES + 1)
+)
 
 # State Management
 STATE_DIR = '.backup_states'
 STATE_FILE_PREFIX = 'state_'
 STATE_FILE_SUFFIX = '.json'
-STATE_VERSION = '1.0'
+STATE_VERSION = '1.1'  # 1.1: uploaded/failed file keys relative to base directory
 
 # Logging Configuration
 LOG_DIR = 'logs'
@@ -58,6 +70,12 @@ LOG_DATE_PACIFIC_FORMAT = '%Y-%m-%d'  # For Pacific date-based log filenames
 # Album Configuration
 MAX_ALBUM_NAME_LENGTH = 500
 ALBUM_NAME_INVALID_CHARS = '<>:"/\\|?*'
+_ALBUM_INVALID_CHARS_RE = re.compile('[' + re.escape(ALBUM_NAME_INVALID_CHARS) + ']')
+
+# Precompiled patterns for get_state_filename: one linear scan each instead
+# of repeated whole-string .replace() passes
+_STATE_INVALID_CHARS_RE = re.compile(r'[/\\<>:"|?*]')
+_MULTI_HYPHEN_RE = re.compile(r'-{2,}')
 
 def get_state_filename(directory_path: str) -> str:
     """
@@ -66,19 +84,14 @@ def get_state_filename(directory_path: str) -> str:
     """
     # Normalize path and remove leading/trailing separators
     normalized_path = os.path.normpath(directory_path).strip(os.sep)
-    
+
     # Replace path separators and invalid filename characters with hyphens
-    sanitized = normalized_path.replace(os.sep, '-').replace('/', '-').replace('\\', '-')
-    
-    # Remove other potentially problematic characters
-    invalid_chars = '<>:"|?*'
-    for char in invalid_chars:
-        sanitized = sanitized.replace(char, '-')
-    
-    # Remove multiple consecutive hyphens
-    while '--' in sanitized:
-        sanitized = sanitized.replace('--', '-')
-    
+    sanitized = normalized_path.replace(os.sep, '-')
+    sanitized = _STATE_INVALID_CHARS_RE.sub('-', sanitized)
+
+    # Collapse consecutive hyphens
+    sanitized = _MULTI_HYPHEN_RE.sub('-', sanitized)
+
     # Remove leading/trailing hyphens
     sanitized = sanitized.strip('-')
     
@@ -92,42 +105,51 @@ def get_state_filepath(directory_path: str) -> str:
     filename = get_state_filename(directory_path)
     return os.path.join(STATE_DIR, filename)
 
+# ensure_directories_exist is called from several hot entry points; the
+# directories only need creating once per process
+_dirs_ensured = False
+
 def ensure_directories_exist():
-    """Create necessary directories if they don't exist."""
+    """Create necessary directories if they don't exist (once per process)."""
+    global _dirs_ensured
+    if _dirs_ensured:
+        return
     os.makedirs(STATE_DIR, exist_ok=True)
     os.makedirs(LOG_DIR, exist_ok=True)
+    _dirs_ensured = True
+
+def get_file_extension(filename: str) -> str:
+    """Get the lowercased file extension (e.g. '.jpg')."""
+    return os.path.splitext(filename)[1].lower()
 
 def is_supported_file(filename: str) -> bool:
     """Check if a file is a supported media format."""
-    extension = os.path.splitext(filename)[1].lower()
-    return extension in SUPPORTED_FORMATS
+    return get_file_extension(filename) in SUPPORTED_FORMATS
 
 def is_image_file(filename: str) -> bool:
     """Check if a file is a supported image format."""
-    extension = os.path.splitext(filename)[1].lower()
-    return extension in SUPPORTED_IMAGE_FORMATS
+    return get_file_extension(filename) in SUPPORTED_IMAGE_FORMATS
 
 def is_video_file(filename: str) -> bool:
     """Check if a file is a supported video format."""
-    extension = os.path.splitext(filename)[1].lower()
-    return extension in SUPPORTED_VIDEO_FORMATS
+    return get_file_extension(filename) in SUPPORTED_VIDEO_FORMATS
 
 def get_max_file_size(filename: str) -> int:
     """Get the maximum allowed file size for a media type."""
-    if is_image_file(filename):
+    # Single splitext call instead of one per predicate
+    extension = get_file_extension(filename)
+    if extension in SUPPORTED_IMAGE_FORMATS:
         return MAX_PHOTO_SIZE
-    elif is_video_file(filename):
+    elif extension in SUPPORTED_VIDEO_FORMATS:
         return MAX_VIDEO_SIZE
     else:
         return 0  # Unsupported file type
 
 def sanitize_album_name(name: str) -> str:
     """Sanitize album name according to Google Photos requirements."""
-    # Replace invalid characters with spaces
-    sanitized = name
-    for char in ALBUM_NAME_INVALID_CHARS:
-        sanitized = sanitized.replace(char, ' ')
-    
+    # Replace invalid characters with spaces in one pass
+    sanitized = _ALBUM_INVALID_CHARS_RE.sub(' ', name)
+
     # Remove extra whitespace
     sanitized = ' '.join(sanitized.split())
     
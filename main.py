@@ -11,19 +11,22 @@ import sys
 import argparse
 import logging
 from datetime import datetime
-from typing import List, Tuple
+from typing import Tuple
 import signal
+import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
 from tqdm import tqdm
 
 # Import our modules
-from config import ensure_directories_exist, LOG_DIR, LOG_TIMESTAMP_FORMAT
+from config import ensure_directories_exist, is_supported_file, LOG_DIR, LOG_TIMESTAMP_FORMAT
 from auth import GooglePhotosAuth
-from state_manager import BackupState, list_all_states
-from quota_tracker import QuotaTracker, estimate_total_requests_for_backup
+from state_manager import BackupState, list_all_states, read_snapshot
+from quota_tracker import QuotaTracker, QuotaLimitType, estimate_total_requests_for_backup
 from album_manager import AlbumManager, AlbumExistsAction
 from uploader import MediaUploader, get_directory_media_count
 from safe_logging import safe_log
-from timezone_utils import get_pacific_date_string, format_pacific_time_for_logging, get_pacific_datetime_string
+from timezone_utils import get_pacific_date_string, format_pacific_time_for_logging
 
 # System directories and files to skip
 SKIP_DIRECTORIES = {
@@ -45,23 +48,32 @@ SKIP_DIRECTORIES = {
 interrupted = False
 current_state = None
 
-def should_skip_directory(directory_path: str) -> bool:
-    """Check if a directory should be skipped based on system directory patterns"""
-    dir_name = os.path.basename(directory_path).lower()
-    
-    # Check against skip list
-    if dir_name in SKIP_DIRECTORIES:
-        return True
-    
-    # Check for hidden directories (starting with .)
-    if dir_name.startswith('.') and len(dir_name) > 1:
+# Directory-scan parallelism: readdir latency dominates on network/NAS
+# mounts, so overlap it. Drop to ~4 for local SSDs if contention shows.
+WALK_THREADS = int(os.environ.get('BACKUP_WALK_THREADS', '32'))
+
+# Lowercased skip list for one C-level set probe per directory name
+_SKIP_NAMES_LC = frozenset(name.lower() for name in SKIP_DIRECTORIES)
+
+def _should_skip_name(dir_name: str) -> bool:
+    """
+    Check a directory basename against the skip rules: the known system
+    names, hidden directories (.name), and Windows/Synology system
+    prefixes ($..., @...). One lower() plus a prefix test and a
+    frozenset lookup — cheaper per entry than a regex match in the
+    walker's hot loop.
+    """
+    lowered = dir_name.lower()
+    first = lowered[:1]
+    if first in '$@':
         return True
-    
-    # Check for Windows system attributes or patterns
-    if dir_name.startswith('$') or dir_name.startswith('@'):
+    if first == '.' and len(lowered) > 1:
         return True
-        
-    return False
+    return lowered in _SKIP_NAMES_LC
+
+def should_skip_directory(directory_path: str) -> bool:
+    """Check if a directory should be skipped based on system directory patterns"""
+    return _should_skip_name(os.path.basename(directory_path))
 
 
 def signal_handler(signum, frame):
@@ -123,143 +135,220 @@ def setup_logging(verbose: bool = False, log_file: str = None):
     
     return log_file
 
-def get_all_subdirectories(base_path: str) -> List[str]:
-    """Get all subdirectories recursively, sorted by depth (deepest first)"""
-    subdirs = []
-    skipped_count = 0
-    
-    try:
-        for root, dirs, files in os.walk(base_path):
-            # Skip system directories
-            if should_skip_directory(root):
-                skipped_count += 1
-                continue
-            
-            # Filter out system directories from the dirs list to prevent os.walk from entering them
-            dirs[:] = [d for d in dirs if not should_skip_directory(os.path.join(root, d))]
-            
-            # Only include directories that have media files
-            total_files, supported_files = get_directory_media_count(root)
-            if supported_files > 0:
-                subdirs.append(root)
-    
-    except PermissionError as e:
-        safe_log('error', f"Permission denied accessing {base_path}: {e}")
-        return []
-    
-    except Exception as e:
-        safe_log('error', f"Error walking directory {base_path}: {e}")
-        return []
-    
-    # Sort by depth (deepest first) to process leaf directories first
-    subdirs.sort(key=lambda x: x.count(os.sep), reverse=True)
-    
-    if skipped_count > 0:
-        safe_log('info', f"Skipped {skipped_count} system/hidden directories")
-    
-    return subdirs
+class TreeScanner:
+    """
+    Threaded walker that streams directories out of the scan as soon as
+    their whole subtree has been enumerated, children before parents, so
+    uploads of deep leaves start while shallower branches are still being
+    walked. Avoids materializing the full directory list for huge trees.
 
-def estimate_backup_scope(base_directory: str) -> Tuple[int, int, int]:
+    dir_counts maps each emitted directory to (total_files, supported_files);
+    total_supported and total_dirs are final once the stream is exhausted.
     """
-    Estimate the scope of a backup operation.
-    Returns (total_files, total_directories, estimated_requests)
+
+    def __init__(self, base_path: str):
+        self.base_path = base_path
+        self.dir_counts = {}
+        self.total_supported = 0
+        self.total_dirs = 0
+        self.skipped_count = 0
+        self._queue: queue.Queue = queue.Queue()
+        # Set when the consumer abandons the stream; the walker checks it
+        # so it doesn't keep scanning the rest of the tree into the queue
+        self._stop = threading.Event()
+
+    def directories(self):
+        """Yield directories with media while the walk runs in the background"""
+        walker = threading.Thread(target=self._walk, daemon=True)
+        walker.start()
+        try:
+            while True:
+                directory = self._queue.get()
+                if directory is None:
+                    break
+                yield directory
+        finally:
+            # Runs on normal exhaustion and on early abandonment (quota
+            # hit, directory failure, Ctrl-C); in the latter case the walk
+            # would otherwise enumerate the whole remaining tree — minutes
+            # on a large NAS — before the process could exit
+            self._stop.set()
+            walker.join()
+        if self.skipped_count > 0:
+            safe_log('info', f"Skipped {self.skipped_count} system/hidden directories")
+
+    def _scan_one(self, path: str):
+        """Enumerate a single directory: classify children and count media"""
+        total_files = 0
+        supported_files = 0
+        child_dirs = []
+        skipped = 0
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    # Match the skip patterns on entry.name directly —
+                    # no basename call needed
+                    if _should_skip_name(entry.name):
+                        skipped += 1
+                    else:
+                        child_dirs.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    total_files += 1
+                    if is_supported_file(entry.name):
+                        supported_files += 1
+        return total_files, supported_files, child_dirs, skipped
+
+    def _walk(self):
+        """Producer: scan concurrently, emit a directory once its subtree is done"""
+        if should_skip_directory(self.base_path):
+            safe_log('info', f"Base directory is a system directory, nothing to scan: {self.base_path}")
+            self._queue.put(None)
+            return
+
+        parent = {self.base_path: None}
+        children_left = {}  # unfinished child subtrees per scanned directory
+        has_media = set()
+
+        def subtree_complete(path):
+            # Children were emitted as their subtrees finished; now emit
+            # this directory, then walk completion up toward the root
+            while path is not None:
+                if path in has_media:
+                    self._queue.put(path)
+                parent_path = parent[path]
+                if parent_path is None:
+                    return
+                children_left[parent_path] -= 1
+                if children_left[parent_path] > 0:
+                    return
+                path = parent_path
+
+        try:
+            # The walk is I/O bound (readdir latency), so scan directories
+            # concurrently; only this thread touches the bookkeeping dicts
+            with ThreadPoolExecutor(max_workers=WALK_THREADS) as executor:
+                pending = {executor.submit(self._scan_one, self.base_path): self.base_path}
+
+                while pending and not self._stop.is_set():
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        current = pending.pop(future)
+                        try:
+                            total_files, supported_files, child_dirs, skipped = future.result()
+                        except PermissionError as e:
+                            safe_log('error', f"Permission denied accessing {current}: {e}")
+                            total_files = supported_files = skipped = 0
+                            child_dirs = []
+                        except OSError as e:
+                            safe_log('error', f"Error scanning directory {current}: {e}")
+                            total_files = supported_files = skipped = 0
+                            child_dirs = []
+
+                        self.skipped_count += skipped
+
+                        # Only emit directories that have media files
+                        if supported_files > 0:
+                            self.dir_counts[current] = (total_files, supported_files)
+                            self.total_supported += supported_files
+                            self.total_dirs += 1
+                            has_media.add(current)
+
+                        children_left[current] = len(child_dirs)
+                        for child in child_dirs:
+                            parent[child] = current
+                            pending[executor.submit(self._scan_one, child)] = child
+
+                        if not child_dirs:
+                            subtree_complete(current)
+
+                if pending:
+                    # Consumer stopped early: drop scans that haven't
+                    # started; the few in flight finish on executor exit
+                    for future in pending:
+                        future.cancel()
+
+        except Exception as e:
+            safe_log('error', f"Error walking directory {self.base_path}: {e}")
+        finally:
+            self._queue.put(None)
+
+def make_album_namer(base_directory: str, naming_strategy: str,
+                     custom_album_name: str = None):
     """
-    total_files = 0
-    directories_with_media = 0
-    
-    for root, dirs, files in os.walk(base_directory):
-        # Skip system directories
-        if should_skip_directory(root):
-            continue
-            
-        # Filter out system directories from the dirs list to prevent os.walk from entering them
-        dirs[:] = [d for d in dirs if not should_skip_directory(os.path.join(root, d))]
-        
-        total_dir_files, supported_files = get_directory_media_count(root)
-        if supported_files > 0:
-            total_files += supported_files
-            directories_with_media += 1
-    
-    estimated_requests = estimate_total_requests_for_backup(total_files, directories_with_media)
-    
-    return total_files, directories_with_media, estimated_requests
+    Build a directory→album-name function specialized once per run.
+    The strategy branching, base-name lookup, and prefix length are all
+    resolved here, so the per-directory call is a slice + replace instead
+    of re-running os.path.relpath and the strategy ladder every time.
+    naming_strategy: "relative" (default), "full", or "leaf"
+    """
+    if custom_album_name:
+        return lambda directory: custom_album_name
+
+    base_abs = base_directory.rstrip(os.sep) if base_directory else ""
+    base_name = os.path.basename(base_abs) or "Root"
+    # Slice point for relative paths: everything past "<base>/"
+    base_prefix_len = len(base_abs) + len(os.sep)
+    # Bind the invariants into the closures: no global/attribute lookups
+    # in the per-directory call
+    sep = os.sep
+    basename = os.path.basename
+
+    if naming_strategy == "leaf":
+        # Use only the leaf directory name
+        def namer(directory):
+            return basename(directory) or "Root"
+    elif naming_strategy == "full":
+        # Base directory name plus the dashed relative path
+        def namer(directory):
+            rel_path = directory[base_prefix_len:]
+            if not rel_path:
+                return base_name
+            return f"{base_name}-{rel_path.replace(sep, '-')}"
+    else:
+        # Default: dashed relative path excluding the base directory
+        def namer(directory):
+            rel_path = directory[base_prefix_len:]
+            if not rel_path:
+                return base_name
+            return rel_path.replace(sep, '-')
 
-def process_directory(directory: str, album_manager: AlbumManager, uploader: MediaUploader, 
-                     exists_action: str, dry_run: bool = False, 
-                     base_directory: str = None, naming_strategy: str = "relative", 
-                     custom_album_name: str = None, album_id: str = None) -> Tuple[bool, int, int, int, str]:
+    return namer
+
+def process_directory(directory: str, album_manager: AlbumManager, uploader: MediaUploader,
+                     exists_action: str, dry_run: bool = False,
+                     album_namer=None, custom_album_name: str = None,
+                     album_id: str = None,
+                     dir_counts: dict = None) -> Tuple[bool, int, int, int, str]:
     """
     Process a single directory: create album and upload files.
-    naming_strategy: "relative" (default), "full", or "leaf"
+    album_namer maps the directory to its album name (see make_album_namer).
     Returns (success, uploaded_count, skipped_count, failed_count, album_name)
     """
     global interrupted
-    
+
     if interrupted:
         return False, 0, 0, 0, ""
-    
+
     # Determine album name and ID
-    if custom_album_name:
-        # Use the provided custom album name
-        album_name = custom_album_name
-        # If album_id is provided, use it (for single album uploads)
-        if album_id:
-            target_album_id = album_id
-            created_new = False
-        else:
-            # Create/get the album (this should only happen once for custom names, skip for dry run)
-            if not dry_run:
-                target_album_id, created_new = album_manager.get_or_create_album(album_name, exists_action)
-            else:
-                target_album_id, created_new = None, False
+    album_name = album_namer(directory) if album_namer else os.path.basename(directory) or "Root"
+
+    if album_id:
+        # Single-album uploads resolved the album once up front
+        target_album_id = album_id
+        created_new = False
+    elif not dry_run:
+        target_album_id, created_new = album_manager.get_or_create_album(album_name, exists_action)
     else:
-        # Generate album name based on naming strategy
-        if naming_strategy == "leaf":
-            # Use only the leaf directory name
-            album_name = os.path.basename(directory)
-            if not album_name:
-                album_name = "Root"
-        elif naming_strategy == "full":
-            # Use full path including base directory
-            if base_directory:
-                # Get the base directory name and combine with relative path
-                base_name = os.path.basename(base_directory.rstrip(os.sep))
-                rel_path = os.path.relpath(directory, base_directory)
-                if rel_path == ".":
-                    album_name = base_name if base_name else "Root"
-                else:
-                    # Combine base name with relative path
-                    album_name = f"{base_name}-{rel_path.replace(os.sep, '-')}"
-            else:
-                album_name = os.path.basename(directory)
-                if not album_name:
-                    album_name = "Root"
-        else:
-            # Default: relative path excluding base directory
-            if base_directory:
-                rel_path = os.path.relpath(directory, base_directory)
-                if rel_path == ".":
-                    # If we're at the base directory itself, use its name
-                    album_name = os.path.basename(base_directory) if os.path.basename(base_directory) else "Root"
-                else:
-                    # Use relative path with dashes
-                    album_name = rel_path.replace(os.sep, "-")
-            else:
-                album_name = os.path.basename(directory)
-                if not album_name:
-                    album_name = "Root"
-        
-        # Create/get the album for directory-based naming (skip for dry run)
-        if not dry_run:
-            target_album_id, created_new = album_manager.get_or_create_album(album_name, exists_action)
-        else:
-            target_album_id, created_new = None, False
-    
+        target_album_id, created_new = None, False
+
     safe_log('info', f"\n📁 Processing directory: {directory}")
     safe_log('info', f"   Album name: {album_name}")
     
-    # Count files in directory
-    total_files, supported_files = get_directory_media_count(directory)
+    # Count files in directory (the scan pass already counted most of them)
+    if dir_counts and directory in dir_counts:
+        total_files, supported_files = dir_counts[directory]
+    else:
+        total_files, supported_files = get_directory_media_count(directory)
     
     if supported_files == 0:
         logging.info(f"   No supported media files found, skipping")
@@ -329,29 +418,14 @@ def run_backup(args):
         current_state = state
     elif args.reset_quota_only:
         safe_log('info', "🔄 Resetting quota counters to 0")
-        # Reset daily and session quota counters while keeping upload progress
-        pacific_today = get_pacific_date_string()
-        state.state_data['daily_quota'] = {
-            'date': pacific_today,
-            'total_requests': 0,
-            'reset_at': get_pacific_datetime_string(),
-            'timezone': 'Pacific'
-        }
-        state.state_data['current_session']['api_requests_count'] = 0
-        state.save_state()
+        # Reset daily and session quota counters while keeping upload
+        # progress — the sidecar write avoids rewriting the whole state
+        state.update_quota_only(daily=0, session=0)
         safe_log('info', "✅ Quota counters reset to 0, upload progress preserved")
     elif args.set_quota_usage is not None:
         safe_log('info', f"🔄 Setting daily quota usage to {args.set_quota_usage}")
         # Set daily quota to match Google API console usage
-        pacific_today = get_pacific_date_string()
-        state.state_data['daily_quota'] = {
-            'date': pacific_today,
-            'total_requests': args.set_quota_usage,
-            'reset_at': get_pacific_datetime_string(),
-            'timezone': 'Pacific'
-        }
-        state.state_data['current_session']['api_requests_count'] = 0
-        state.save_state()
+        state.update_quota_only(daily=args.set_quota_usage, session=0)
         safe_log('info', f"✅ Daily quota set to {args.set_quota_usage}, session reset to 0, upload progress preserved")
     
     # Show existing state info
@@ -359,29 +433,20 @@ def run_backup(args):
     if last_dir:
         safe_log('info', f"📝 Resuming from previous session")
         safe_log('info', f"   Last processed: {last_dir}")
-        safe_log('info', f"   Files uploaded so far: {len(state.get_uploaded_files())}")
+        safe_log('info', f"   Files uploaded so far: {state.uploaded_count}")
     
     state.start_new_session()
     
-    # Estimate backup scope
-    safe_log('info', "📊 Analyzing backup scope...")
-    total_files, total_dirs, estimated_requests = estimate_backup_scope(base_directory)
-    
-    # Get already uploaded count
-    already_uploaded = len(state.get_uploaded_files())
-    remaining_files = max(0, total_files - already_uploaded)
-    
-    logging.info(f"   Total supported files: {total_files:,}")
+    # Stream the tree scan: directories are handed to the upload loop as
+    # their subtrees finish enumerating, instead of blocking all uploads
+    # until the whole walk is done. Totals are reported in the summary.
+    safe_log('info', "📊 Scanning directory tree (uploads start as branches complete)...")
+    scanner = TreeScanner(base_directory)
+    dir_counts = scanner.dir_counts
+
+    already_uploaded = state.uploaded_count
     logging.info(f"   Already uploaded: {already_uploaded:,}")
-    logging.info(f"   Remaining to upload: {remaining_files:,}")
-    logging.info(f"   Directories with media: {total_dirs:,}")
-    
-    if not args.dry_run:
-        logging.info(f"   Estimated API requests: {estimated_requests:,}")
-        
-        if estimated_requests > 9000:
-            safe_log('warning', f"⚠️  Large backup detected! This may require multiple days to complete.")
-    
+
     # Authenticate
     if not args.dry_run:
         safe_log('info', "🔐 Authenticating with Google Photos...")
@@ -404,7 +469,8 @@ def run_backup(args):
         service = None
     
     # Initialize components
-    quota = QuotaTracker(state, max_session_requests=args.max_requests)
+    quota = QuotaTracker(state, max_session_requests=args.max_requests,
+                         max_writes_per_minute=args.writes_per_minute)
     
     # Debug: Show current quota status
     daily_usage = state.get_daily_quota_usage()
@@ -413,11 +479,10 @@ def run_backup(args):
     
     if not args.dry_run:
         album_manager = AlbumManager(service, state, quota)
-        uploader = MediaUploader(service, state, quota)
-        
-        # Set total files count for progress tracking
-        uploader.set_total_files_count(total_files)
-        
+        uploader = MediaUploader(service, state, quota,
+                                 pool_size=max(1, args.upload_concurrency),
+                                 dedup_by_content=args.dedup_by_content)
+
         # Load existing albums
         safe_log('info', "📚 Loading existing albums...")
         if not album_manager.load_existing_albums():
@@ -438,15 +503,6 @@ def run_backup(args):
         exists_action = AlbumExistsAction.STOP
         safe_log('info', "📋 Policy: Stop if album exists")
     
-    # Get directories to process
-    directories = get_all_subdirectories(base_directory)
-    
-    if not directories:
-        safe_log('warning', "⚠️  No directories with supported media files found")
-        return 0
-    
-    safe_log('info', f"📁 Found {len(directories)} directories to process")
-    
     # Handle custom album name (single album for all files)
     custom_album_id = None
     if args.album_name and not args.dry_run:
@@ -471,55 +527,133 @@ def run_backup(args):
     total_skipped = 0
     total_failed = 0
     album_preview = {}  # For dry run: {album_name: file_count}
-    
-    with tqdm(directories, desc="Processing directories", disable=args.verbose) as pbar:
-        for directory in pbar:
-            if interrupted:
-                safe_log('info', "🛑 Processing interrupted by user")
-                break
-            
-            pbar.set_description(f"Processing: {os.path.basename(directory)}")
-            
-            state.set_last_processed_directory(directory)
-            
-            # Determine naming strategy (only used if no custom album name)
-            if args.album_name_full:
-                naming_strategy = "full"
-            elif args.album_name_leaf:
-                naming_strategy = "leaf"
-            else:
-                naming_strategy = "relative"  # default
-            
-            success, uploaded, skipped, failed, album_name = process_directory(
-                directory, album_manager, uploader, exists_action, args.dry_run,
-                base_directory=base_directory, naming_strategy=naming_strategy,
-                custom_album_name=args.album_name, album_id=custom_album_id
-            )
-            
-            # Collect album names for dry run preview
-            if args.dry_run and album_name:
-                if album_name in album_preview:
-                    album_preview[album_name] += skipped  # skipped = supported files in dry run
-                else:
-                    album_preview[album_name] = skipped
-            
-            total_uploaded += uploaded
-            total_skipped += skipped
-            total_failed += failed
-            
-            if not success:
-                safe_log('error', f"❌ Failed to process directory: {directory}")
-                if not args.dry_run:
+
+    # Determine naming strategy (only used if no custom album name)
+    if args.album_name_full:
+        naming_strategy = "full"
+    elif args.album_name_leaf:
+        naming_strategy = "leaf"
+    else:
+        naming_strategy = "relative"  # default
+
+    # Specialize the directory→album-name mapping once for the whole run
+    album_namer = make_album_namer(base_directory, naming_strategy, args.album_name)
+
+    # Dry runs stay sequential; real uploads can overlap HTTP round-trips
+    concurrency = 1 if args.dry_run else max(1, args.upload_concurrency)
+
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor, \
+             tqdm(desc="Processing directories", disable=args.verbose) as pbar:
+
+            # Flipped by handle_result on failure or quota exhaustion;
+            # results are handled on this thread, so a plain bool is safe
+            stop_submitting = False
+
+            def handle_result(future, directory):
+                nonlocal total_uploaded, total_skipped, total_failed, stop_submitting
+                try:
+                    success, uploaded, skipped, failed, album_name = future.result()
+                except Exception as e:
+                    safe_log('error', f"❌ Failed to process directory: {directory}: {e}")
+                    total_failed += 1
+                    pbar.update(1)
+                    stop_submitting = True
+                    return
+
+                state.set_last_processed_directory(directory)
+                state.maybe_save()
+                total_uploaded += uploaded
+                total_skipped += skipped
+                total_failed += failed
+                pbar.update(1)
+
+                if not success:
+                    safe_log('error', f"❌ Failed to process directory: {directory}")
                     state.set_stop_reason(f"Failed to process directory: {directory}")
+                    stop_submitting = True
+                elif quota.check_quota_limits() != QuotaLimitType.NONE:
+                    stop_submitting = True
+
+            future_dirs = {}
+            for directory in scanner.directories():
+                if interrupted:
+                    safe_log('info', "🛑 Processing interrupted by user")
                     break
-            
-            # Check quota limits
-            if not args.dry_run and not quota.check_quota_limits():
-                break
-            
-            # Save state after each directory
-            state.save_state()
-    
+                if stop_submitting:
+                    safe_log('info', "🛑 Stopping: directory failed or quota limit reached")
+                    break
+
+                future_dirs[executor.submit(
+                    process_directory, directory, album_manager, uploader,
+                    exists_action, args.dry_run, album_namer=album_namer,
+                    custom_album_name=args.album_name,
+                    album_id=custom_album_id, dir_counts=dir_counts
+                )] = directory
+
+                # Keep a bounded window in flight so the walk and the
+                # uploads overlap without queueing the entire tree
+                while len(future_dirs) >= concurrency * 2:
+                    done, _ = wait(future_dirs, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        handle_result(future, future_dirs.pop(future))
+
+            for future in as_completed(future_dirs):
+                handle_result(future, future_dirs[future])
+    else:
+        with tqdm(scanner.directories(), desc="Processing directories",
+                  disable=args.verbose) as pbar:
+            for directory in pbar:
+                if interrupted:
+                    safe_log('info', "🛑 Processing interrupted by user")
+                    break
+
+                pbar.set_description(f"Processing: {os.path.basename(directory)}")
+
+                state.set_last_processed_directory(directory)
+
+                success, uploaded, skipped, failed, album_name = process_directory(
+                    directory, album_manager, uploader, exists_action, args.dry_run,
+                    album_namer=album_namer, custom_album_name=args.album_name,
+                    album_id=custom_album_id, dir_counts=dir_counts
+                )
+
+                # Collect album names for dry run preview
+                if args.dry_run and album_name:
+                    if album_name in album_preview:
+                        album_preview[album_name] += skipped  # skipped = supported files in dry run
+                    else:
+                        album_preview[album_name] = skipped
+
+                total_uploaded += uploaded
+                total_skipped += skipped
+                total_failed += failed
+
+                if not success:
+                    safe_log('error', f"❌ Failed to process directory: {directory}")
+                    if not args.dry_run:
+                        state.set_stop_reason(f"Failed to process directory: {directory}")
+                        break
+
+                # Check quota limits (NONE means no limit was hit)
+                if not args.dry_run and quota.check_quota_limits() != QuotaLimitType.NONE:
+                    break
+
+                # Per-directory progress goes to the append-only journal
+                # (set_last_processed_directory); snapshots are debounced
+                state.maybe_save()
+
+    # Fold the journal into a full snapshot on graceful exit
+    state.save_state()
+
+    # Totals are only known once the stream is exhausted
+    total_files = scanner.total_supported
+    total_dirs = scanner.total_dirs
+
+    if total_dirs == 0 and not interrupted:
+        safe_log('warning', "⚠️  No directories with supported media files found")
+        return 0
+
     # Final summary
     logging.info("\n" + "="*60)
     safe_log('info', "📊 BACKUP SUMMARY")
@@ -544,8 +678,12 @@ def run_backup(args):
         safe_log('info', f"\n📊 Album Summary:")
         logging.info(f"   Total albums: {total_albums}")
         logging.info(f"   Total files: {total_files_in_albums:,}")
-    
+        estimated_requests = estimate_total_requests_for_backup(total_files, total_dirs)
+        logging.info(f"   Estimated API requests for a real run: {estimated_requests:,}")
+
     safe_log('info', f"\n📁 Directory Processing:")
+    logging.info(f"   Directories with media: {total_dirs:,}")
+    logging.info(f"   Total supported files: {total_files:,}")
     logging.info(f"   Files uploaded: {total_uploaded:,}")
     logging.info(f"   Files skipped: {total_skipped:,}")
     logging.info(f"   Files failed: {total_failed:,}")
@@ -580,15 +718,31 @@ def list_states_command(args):
             basename = os.path.basename(state_file)
             print(f"State file: {basename}")
             
-            # Load and show summary
-            with open(state_file, 'r') as f:
-                import json
-                data = json.load(f)
+            # Load and show summary (handles zstd-compressed snapshots)
+            import json
+            data = read_snapshot(state_file)
             
             base_dir = data.get('base_directory', 'Unknown')
             uploaded_count = len(data.get('uploaded_files', {}))
             failed_count = len(data.get('failed_uploads', {}))
             last_updated = data.get('last_updated', 'Unknown')
+
+            # Newer states keep per-file records in the .files sidecar
+            files_sidecar = state_file + '.files'
+            if os.path.exists(files_sidecar):
+                with open(files_sidecar, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue
+                        if record.get('op') == 'fail':
+                            failed_count += 1
+                        else:
+                            uploaded_count += 1
             
             print(f"  Directory: {base_dir}")
             print(f"  Files uploaded: {uploaded_count}")
@@ -602,6 +756,22 @@ def list_states_command(args):
     
     return 0
 
+def dump_state_command(args):
+    """Pretty-print a state file (snapshots are stored compact and
+    possibly zstd-compressed, so raw files aren't human-readable)"""
+    import json
+    try:
+        data = read_snapshot(args.dump_state)
+    except FileNotFoundError:
+        print(f"State file not found: {args.dump_state}")
+        return 1
+    except ValueError as e:
+        print(f"Failed to read state file: {e}")
+        return 1
+
+    print(json.dumps(data, indent=2, ensure_ascii=False))
+    return 0
+
 def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(
@@ -663,6 +833,12 @@ Examples:
                        help='Verbose logging output')
     parser.add_argument('--max-requests', type=int, default=9500,
                        help='Maximum API requests before stopping (default: 9500)')
+    parser.add_argument('--writes-per-minute', type=int, default=75,
+                       help='Maximum write requests per minute (default: 75, per Google Photos API limits)')
+    parser.add_argument('--upload-concurrency', type=int, default=5, metavar='N',
+                       help='Number of directories to upload in parallel (default: 5, 1 disables)')
+    parser.add_argument('--dedup-by-content', action='store_true',
+                       help='Skip files whose content was already uploaded under another path (hashes every new file)')
     
     # State management
     parser.add_argument('--reset-state', action='store_true',
@@ -673,6 +849,8 @@ Examples:
                        help='Set daily quota usage to specific number (from Google API console)')
     parser.add_argument('--list-states', action='store_true',
                        help='List all existing backup states and exit')
+    parser.add_argument('--dump-state', type=str, metavar='PATH',
+                       help='Pretty-print a state file and exit (state files are stored compact)')
     
     # If no arguments provided, show help
     if len(sys.argv) == 1:
@@ -684,10 +862,14 @@ Examples:
     # Handle list-states command
     if args.list_states:
         return list_states_command(args)
+
+    # Handle dump-state command
+    if args.dump_state:
+        return dump_state_command(args)
     
     # Validate required arguments
     if not args.directory:
-        parser.error("directory argument is required unless using --list-states")
+        parser.error("directory argument is required unless using --list-states or --dump-state")
     
     # Validate conflicting options
     if args.skip_existing and args.merge_existing:
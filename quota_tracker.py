@@ -1,13 +1,17 @@
 """Quota tracking and management for Google Photos API"""
 
 import logging
+import threading
+import time
+from collections import deque
 from typing import Optional
 from datetime import datetime, timezone
 from enum import Enum
 
 from config import (
-    DEFAULT_MAX_REQUESTS_PER_SESSION, 
+    DEFAULT_MAX_REQUESTS_PER_SESSION,
     DEFAULT_MAX_DAILY_REQUESTS,
+    DEFAULT_MAX_WRITES_PER_MINUTE,
     REQUEST_SAFETY_BUFFER
 )
 from state_manager import BackupState
@@ -21,47 +25,106 @@ class QuotaLimitType(Enum):
     SESSION_LIMIT = "session_limit"
     NONE = "none"
 
+# Fixed per-operation request costs; list_albums stays special-cased
+# because its cost depends on the album count
+_OP_COST = {
+    "upload_file": 2,      # upload bytes + create media item
+    "create_album": 1,
+    "add_to_album": 1,     # batch operation
+}
+
 class QuotaTracker:
     """Tracks and manages API quota usage"""
     
-    def __init__(self, state: BackupState, max_session_requests: Optional[int] = None, 
-                 max_daily_requests: Optional[int] = None):
+    def __init__(self, state: BackupState, max_session_requests: Optional[int] = None,
+                 max_daily_requests: Optional[int] = None,
+                 max_writes_per_minute: Optional[int] = None):
         self.state = state
         self.max_session_requests = max_session_requests or DEFAULT_MAX_REQUESTS_PER_SESSION
         self.max_daily_requests = max_daily_requests or DEFAULT_MAX_DAILY_REQUESTS
-        
+        self.max_writes_per_minute = max_writes_per_minute or DEFAULT_MAX_WRITES_PER_MINUTE
+        # 80% warn thresholds as ints: status checks compare counters
+        # against these instead of computing float percentages each time
+        self._daily_warn = int(self.max_daily_requests * 0.8)
+        self._session_warn = int(self.max_session_requests * 0.8)
+        # Counters are shared with worker threads during parallel album adds
+        self._lock = threading.Lock()
+        # Timestamps of write requests in the last 60s (sliding window)
+        self._write_times: deque = deque()
+
+    def acquire(self, cost: int = 1):
+        """
+        Block until `cost` write requests fit under the per-minute write
+        quota (WritesPerMinutePerUser). Pacing ourselves here avoids the
+        HTTP 429 + backoff loop, which burns daily quota on retries.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+
+                # Drop timestamps that have fallen out of the 60s window
+                while self._write_times and now - self._write_times[0] >= 60.0:
+                    self._write_times.popleft()
+
+                if len(self._write_times) + cost <= self.max_writes_per_minute:
+                    for _ in range(cost):
+                        self._write_times.append(now)
+                    return
+
+                # Sleep until the oldest request ages out of the window
+                wait_time = self._write_times[0] + 60.0 - now
+
+            if wait_time > 0:
+                logger.debug(f"Write rate limit reached ({self.max_writes_per_minute}/min), "
+                             f"waiting {wait_time:.1f}s...")
+                time.sleep(wait_time)
+
+    def _usage(self) -> tuple[int, int]:
+        """Read both usage counters once: (daily_usage, session_usage)"""
+        return (self.state.get_daily_quota_usage(),
+                self.state.get_session_request_count())
+
     def record_requests(self, count: int = 1) -> bool:
         """
         Record API requests made.
         Returns True if we can continue, False if quota limit reached.
         """
-        # FIRST: Check if we've crossed midnight Pacific and reset quota if needed
-        quota_was_reset = self.state.check_and_reset_quota_if_needed()
-        if quota_was_reset:
-            # Log the reset event with Pacific time
-            pacific_time_str = format_pacific_time_for_logging()
-            logger.info(f"🔄 Daily quota automatically reset at {pacific_time_str}")
-            logger.info(f"✨ You now have {self.max_daily_requests:,} fresh API requests available!")
-        
-        # Now record the requests (with potentially reset quota)
-        self.state.add_api_request(count)
-        
-        # Check if we've hit any limits AFTER recording
-        limit_type = self.check_quota_limits()
-        
-        if limit_type != QuotaLimitType.NONE:
-            reason = self._get_stop_reason(limit_type)
+        with self._lock:
+            # FIRST: Check if we've crossed midnight Pacific and reset quota if needed
+            quota_was_reset = self.state.check_and_reset_quota_if_needed()
+            if quota_was_reset:
+                # Log the reset event with Pacific time
+                pacific_time_str = format_pacific_time_for_logging()
+                logger.info(f"🔄 Daily quota automatically reset at {pacific_time_str}")
+                logger.info(f"✨ You now have {self.max_daily_requests:,} fresh API requests available!")
+
+            # Now record the requests (with potentially reset quota)
+            self.state.add_api_request(count)
+
+            # Fast path: under both limits — two int compares, no enum,
+            # no extra counter reads. This runs once per API request.
+            daily_usage = self.state._daily_requests
+            session_usage = self.state._session_requests
+            if (daily_usage < self.max_daily_requests
+                    and session_usage < self.max_session_requests):
+                return True
+
+            # Slow path: some limit was hit, build the stop reason
+            usage = (daily_usage, session_usage)
+            limit_type = self.check_quota_limits(usage)
+            reason = self._get_stop_reason(limit_type, daily_usage, session_usage)
             self.state.set_stop_reason(reason)
             logger.warning(f"Quota limit reached: {reason}")
             return False
-        
-        return True
     
-    def check_quota_limits(self) -> QuotaLimitType:
-        """Check if any quota limits have been reached"""
-        daily_usage = self.state.get_daily_quota_usage()
-        session_usage = self.state.get_session_request_count()
-        
+    def check_quota_limits(self, usage: Optional[tuple] = None) -> QuotaLimitType:
+        """
+        Check if any quota limits have been reached.
+        Callers that already hold a _usage() snapshot pass it in so the
+        counters aren't re-read.
+        """
+        daily_usage, session_usage = usage if usage is not None else self._usage()
+
         # Check daily limit
         if daily_usage >= self.max_daily_requests:
             return QuotaLimitType.DAILY_LIMIT
@@ -74,20 +137,20 @@ class QuotaTracker:
     
     def can_make_requests(self, request_count: int = 1) -> bool:
         """Check if we can make the specified number of requests without hitting limits"""
-        # Check if quota should be reset first
-        self.state.check_and_reset_quota_if_needed()
-        
-        daily_usage = self.state.get_daily_quota_usage()
-        session_usage = self.state.get_session_request_count()
-        
-        # Check against limits
-        if daily_usage + request_count > self.max_daily_requests:
-            return False
-        
-        if session_usage + request_count > self.max_session_requests:
-            return False
-        
-        return True
+        with self._lock:
+            # Check if quota should be reset first
+            self.state.check_and_reset_quota_if_needed()
+
+            daily_usage, session_usage = self._usage()
+
+            # Check against limits
+            if daily_usage + request_count > self.max_daily_requests:
+                return False
+
+            if session_usage + request_count > self.max_session_requests:
+                return False
+
+            return True
     
     def get_remaining_daily_quota(self) -> int:
         """Get remaining daily quota"""
@@ -105,30 +168,31 @@ class QuotaTracker:
     
     def get_quota_status(self) -> dict:
         """Get detailed quota status"""
-        daily_usage = self.state.get_daily_quota_usage()
-        session_usage = self.state.get_session_request_count()
-        
+        usage = self._usage()
+        daily_usage, session_usage = usage
+
         return {
             'daily': {
                 'used': daily_usage,
                 'limit': self.max_daily_requests,
-                'remaining': self.get_remaining_daily_quota(),
+                'remaining': max(0, self.max_daily_requests - daily_usage),
                 'percentage': round((daily_usage / self.max_daily_requests) * 100, 1)
             },
             'session': {
                 'used': session_usage,
                 'limit': self.max_session_requests,
-                'remaining': self.get_remaining_session_quota(),
+                'remaining': max(0, self.max_session_requests - session_usage),
                 'percentage': round((session_usage / self.max_session_requests) * 100, 1)
             },
-            'can_continue': self.check_quota_limits() == QuotaLimitType.NONE
+            'can_continue': self.check_quota_limits(usage) == QuotaLimitType.NONE
         }
     
-    def _get_stop_reason(self, limit_type: QuotaLimitType) -> str:
-        """Get human-readable stop reason for quota limit"""
-        daily_usage = self.state.get_daily_quota_usage()
-        session_usage = self.state.get_session_request_count()
-        
+    def _get_stop_reason(self, limit_type: QuotaLimitType,
+                         daily_usage: int, session_usage: int) -> str:
+        """
+        Format a human-readable stop reason for a quota limit. Callers
+        pass the counters they already hold — no re-read here.
+        """
         if limit_type == QuotaLimitType.DAILY_LIMIT:
             return f"Daily API quota reached ({daily_usage}/{self.max_daily_requests} requests). Resume tomorrow."
         elif limit_type == QuotaLimitType.SESSION_LIMIT:
@@ -138,23 +202,13 @@ class QuotaTracker:
     
     def estimate_requests_for_operation(self, operation_type: str, **kwargs) -> int:
         """Estimate number of API requests needed for an operation"""
-        if operation_type == "upload_file":
-            # Upload requires: upload bytes + create media item
-            return 2
-        elif operation_type == "create_album":
-            # Creating an album requires 1 request
-            return 1
-        elif operation_type == "list_albums":
+        if operation_type == "list_albums":
             # Listing albums - depends on number of albums
             # Default page size is 50, so 1 request per 50 albums
             total_albums = kwargs.get('estimated_albums', 50)
             return max(1, (total_albums + 49) // 50)  # Ceiling division
-        elif operation_type == "add_to_album":
-            # Adding media to album requires 1 request
-            return 1
-        else:
-            # Conservative estimate for unknown operations
-            return 1
+        # Conservative default of 1 for unknown operations
+        return _OP_COST.get(operation_type, 1)
     
     def can_perform_operation(self, operation_type: str, **kwargs) -> tuple[bool, str]:
         """
@@ -165,53 +219,69 @@ class QuotaTracker:
         self.state.check_and_reset_quota_if_needed()
         
         estimated_requests = self.estimate_requests_for_operation(operation_type, **kwargs)
-        
-        if not self.can_make_requests(estimated_requests):
-            limit_type = self.check_quota_limits()
-            if limit_type != QuotaLimitType.NONE:
-                return False, self._get_stop_reason(limit_type)
-            
+
+        # One counter snapshot drives every check below — no second pass
+        # through can_make_requests/get_remaining_* re-reading the state
+        daily_usage, session_usage = self._usage()
+        daily_remaining = self.max_daily_requests - daily_usage
+        session_remaining = self.max_session_requests - session_usage
+
+        if daily_remaining < estimated_requests or session_remaining < estimated_requests:
+            # Branch on the locals we already have — no check_quota_limits
+            # round-trip re-deriving the same comparisons
+            if daily_remaining <= 0:
+                return False, self._get_stop_reason(
+                    QuotaLimitType.DAILY_LIMIT, daily_usage, session_usage)
+            if session_remaining <= 0:
+                return False, self._get_stop_reason(
+                    QuotaLimitType.SESSION_LIMIT, daily_usage, session_usage)
+
             # We're close to hitting a limit
-            daily_remaining = self.get_remaining_daily_quota()
-            session_remaining = self.get_remaining_session_quota()
-            
             if daily_remaining < estimated_requests:
                 return False, f"Not enough daily quota remaining ({daily_remaining} < {estimated_requests})"
-            elif session_remaining < estimated_requests:
-                return False, f"Not enough session quota remaining ({session_remaining} < {estimated_requests})"
-        
+            return False, f"Not enough session quota remaining ({session_remaining} < {estimated_requests})"
+
         return True, ""
     
     def get_quota_summary(self) -> str:
         """Get human-readable quota summary"""
-        status = self.get_quota_status()
-        
+        # One pass over the counters — no status dict, no second
+        # computation of the remaining values via get_remaining_quota()
+        daily_usage, session_usage = self._usage()
+        daily_limit = self.max_daily_requests
+        session_limit = self.max_session_requests
+        remaining = min(max(0, daily_limit - daily_usage),
+                        max(0, session_limit - session_usage))
+
         lines = [
             f"📊 Quota Status:",
-            f"   Daily: {status['daily']['used']:,}/{status['daily']['limit']:,} ({status['daily']['percentage']}%)",
-            f"   Session: {status['session']['used']:,}/{status['session']['limit']:,} ({status['session']['percentage']}%)",
-            f"   Remaining: {self.get_remaining_quota():,} requests"
+            f"   Daily: {daily_usage:,}/{daily_limit:,} ({round((daily_usage / daily_limit) * 100, 1)}%)",
+            f"   Session: {session_usage:,}/{session_limit:,} ({round((session_usage / session_limit) * 100, 1)}%)",
+            f"   Remaining: {remaining:,} requests"
         ]
-        
+
         # Add warning if getting close to limits
-        if status['daily']['percentage'] > 80:
+        if daily_usage > self._daily_warn:
             lines.append("   ⚠️  Warning: Approaching daily limit")
-        if status['session']['percentage'] > 80:
+        if session_usage > self._session_warn:
             lines.append("   ⚠️  Warning: Approaching session limit")
-        
+
         return "\n".join(lines)
     
     def should_warn_about_quota(self) -> tuple[bool, str]:
         """Check if we should warn the user about quota usage"""
-        status = self.get_quota_status()
-        
-        # Warn at 80% usage
-        if status['daily']['percentage'] > 80:
-            return True, f"Daily quota at {status['daily']['percentage']}% ({status['daily']['used']:,}/{status['daily']['limit']:,})"
-        
-        if status['session']['percentage'] > 80:
-            return True, f"Session quota at {status['session']['percentage']}% ({status['session']['used']:,}/{status['session']['limit']:,})"
-        
+        daily_usage, session_usage = self._usage()
+
+        # Warn at 80% usage — integer compares on the fast (quiet) path;
+        # percentages are only formatted once a warning actually fires
+        if daily_usage > self._daily_warn:
+            pct = round((daily_usage / self.max_daily_requests) * 100, 1)
+            return True, f"Daily quota at {pct}% ({daily_usage:,}/{self.max_daily_requests:,})"
+
+        if session_usage > self._session_warn:
+            pct = round((session_usage / self.max_session_requests) * 100, 1)
+            return True, f"Session quota at {pct}% ({session_usage:,}/{self.max_session_requests:,})"
+
         return False, ""
 
 def estimate_total_requests_for_backup(num_files: int, num_directories: int, 
@@ -229,8 +299,10 @@ def estimate_total_requests_for_backup(num_files: int, num_directories: int,
     """
     requests = 0
     
-    # File uploads: 2 requests per file (upload + create media item)
-    requests += num_files * 2
+    # File uploads: one byte-upload call per file, plus one batchCreate
+    # per 50 files now that media items are created in batches
+    requests += num_files
+    requests += (num_files + 49) // 50
     
     # Album creation: 1 request per new album (worst case)
     requests += num_directories
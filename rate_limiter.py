@@ -0,0 +1,85 @@
+"""Client-side request pacing for Google Photos API calls"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Pacing defaults: modest steady rate with a small burst allowance.
+# The daily quota (10,000 requests) averages out to ~0.12 req/s, but real
+# sessions are bursty, so we pace per-second and let the adaptive feedback
+# find the server's actual tolerance.
+DEFAULT_RATE_PER_SEC = 2.0
+DEFAULT_BURST = 5
+MAX_RATE_PER_SEC = 10.0
+MIN_RATE_PER_SEC = 0.1
+
+class TokenBucket:
+    """
+    Adaptive token-bucket rate limiter.
+
+    acquire() blocks until a token is available, spacing out API calls so we
+    avoid 429s proactively instead of burning quota units on failed requests.
+    The fill rate adapts to observed congestion: each successful response
+    nudges it up slightly, each 429 halves it, so sustained load settles just
+    below the server's limit instead of bouncing off it.
+    """
+
+    def __init__(self, rate_per_sec: float = DEFAULT_RATE_PER_SEC, burst: int = DEFAULT_BURST):
+        self.rate = rate_per_sec
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """Add tokens accrued since the last refill (caller must hold lock)"""
+        now = time.monotonic()
+        self._tokens = min(float(self.burst),
+                           self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self):
+        """Block until a token is available, then consume it"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        """Nudge the rate up after a successful response"""
+        with self._lock:
+            self.rate = min(MAX_RATE_PER_SEC, self.rate * 1.02)
+
+    def on_rate_limited(self):
+        """Halve the rate and drain the bucket after a 429 response"""
+        with self._lock:
+            self._refill()
+            self.rate = max(MIN_RATE_PER_SEC, self.rate * 0.5)
+            self._tokens = 0.0
+            logger.debug(f"Rate limited: pacing reduced to {self.rate:.2f} req/s")
+
+if __name__ == "__main__":
+    # Test token bucket pacing
+    logging.basicConfig(level=logging.DEBUG)
+
+    bucket = TokenBucket(rate_per_sec=5.0, burst=2)
+
+    print("Acquiring 10 tokens at 5/s with burst of 2...")
+    start = time.monotonic()
+    for i in range(10):
+        bucket.acquire()
+        print(f"  Token {i + 1} at +{time.monotonic() - start:.2f}s")
+
+    print("Simulating a 429...")
+    bucket.on_rate_limited()
+    print(f"Rate after 429: {bucket.rate:.2f} req/s")
+
+    for _ in range(10):
+        bucket.on_success()
+    print(f"Rate after 10 successes: {bucket.rate:.2f} req/s")
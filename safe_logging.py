@@ -2,20 +2,52 @@
 Safe logging utility for Windows Unicode compatibility
 """
 import logging
+import re
 from datetime import datetime
 
+# Emoji → ASCII replacements, applied in one regex pass instead of a
+# str.replace sweep per token (which copied the message up to 17 times)
+_EMOJI_MAP = {
+    '🚀': '[START]',
+    '📁': '[FOLDER]',
+    '📊': '[STATS]',
+    '✅': '[OK]',
+    '❌': '[ERROR]',
+    '⚠️': '[WARNING]',
+    '🔄': '[REFRESH]',
+    '📋': '[LIST]',
+    '💾': '[SAVE]',
+    '🛑': '[STOP]',
+    '🔐': '[AUTH]',
+    '📚': '[BOOKS]',
+    '🎯': '[TARGET]',
+    '✨': '[NEW]',
+    '📝': '[RESUME]',
+    '🎉': '[SUCCESS]',
+    '→': '->'
+}
+
+_EMOJI_RE = re.compile('|'.join(map(re.escape, _EMOJI_MAP)))
+
+def _replace_emoji(match):
+    return _EMOJI_MAP[match.group(0)]
+
 def safe_log(level, message, include_time=False):
     """
     Unicode-safe logging wrapper that handles encoding errors
-    
+
     Args:
         level: logging level (e.g., 'info', 'error', 'warning')
         message: message to log
         include_time: if True, prepend Pacific time to message
     """
-    # Always create ASCII-safe version first
+    # Fast path: pure-ASCII messages (the common case) need no rewriting
+    if not include_time and message.isascii():
+        getattr(logging, level)(message)
+        return
+
     safe_message = message
-    
+
     # Add Pacific time prefix if requested
     if include_time:
         try:
@@ -26,42 +58,18 @@ def safe_log(level, message, include_time=False):
             except ImportError:
                 # Fallback to local system time
                 time_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
+
             safe_message = f"[{time_str}] {safe_message}"
         except Exception:
             # If time formatting fails, just use the original message
             pass
-    
-    # Replace emojis with ASCII equivalents
-    emoji_replacements = {
-        '🚀': '[START]',
-        '📁': '[FOLDER]',
-        '📊': '[STATS]',
-        '✅': '[OK]',
-        '❌': '[ERROR]',
-        '⚠️': '[WARNING]',
-        '🔄': '[REFRESH]',
-        '📋': '[LIST]',
-        '💾': '[SAVE]',
-        '🛑': '[STOP]',
-        '🔐': '[AUTH]',
-        '📚': '[BOOKS]',
-        '🎯': '[TARGET]',
-        '✨': '[NEW]',
-        '📝': '[RESUME]',
-        '🎉': '[SUCCESS]',
-        '→': '->'
-    }
-    
-    for emoji, replacement in emoji_replacements.items():
-        safe_message = safe_message.replace(emoji, replacement)
-    
+
+    # Replace all emojis with ASCII equivalents in a single pass
+    safe_message = _EMOJI_RE.sub(_replace_emoji, safe_message)
+
     # Handle any remaining non-ASCII characters (like Hebrew)
-    try:
-        safe_message.encode('ascii')
-    except UnicodeEncodeError:
-        # If still has non-ASCII, encode with replacement
+    if not safe_message.isascii():
         safe_message = safe_message.encode('ascii', errors='replace').decode('ascii')
-    
+
     # Log the safe version
     getattr(logging, level)(safe_message)
\ No newline at end of file
@@ -1,9 +1,15 @@
 """State management for Google Photos backup tool"""
 
+import atexit
 import json
+import mmap
 import os
+import sys
+import threading
+import time
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional, Set, List
+from types import MappingProxyType
+from typing import Dict, Any, Optional, Set, List, Tuple, Mapping
 import logging
 
 from config import (
@@ -11,19 +17,185 @@ from config import (
 )
 from safe_logging import safe_log
 from timezone_utils import (
-    get_pacific_date_string, get_pacific_datetime_string, 
-    has_pacific_date_changed, get_utc_now
+    get_pacific_date_string, get_pacific_datetime_string,
+    has_pacific_date_changed,
+    get_utc_now_iso as _now_iso, seconds_until_pacific_midnight
 )
 
 logger = logging.getLogger(__name__)
 
+# Optional fast JSON: orjson serializes straight to one bytes buffer
+# instead of walking the object graph through Python callbacks. The
+# stdlib fallback produces the same compact UTF-8 output.
+try:
+    import orjson
+
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(',', ':'),
+                          ensure_ascii=False).encode('utf-8')
+
+    _json_loads = json.loads
+
+# Optional zstd compression for the snapshot: state JSON is highly
+# repetitive (ISO timestamps, album IDs), so even level 3 shrinks it
+# several-fold — less write bandwidth per save, faster loads. Plain
+# JSON is written when zstandard isn't installed, and loading handles
+# both formats either way.
+try:
+    import zstandard as _zstd
+    _ZSTD_CCTX = _zstd.ZstdCompressor(level=3)
+except ImportError:
+    _zstd = None
+    _ZSTD_CCTX = None
+
+# First four bytes of every zstd frame — distinguishes compressed
+# snapshots from plain-JSON ones left by older versions
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# Fresh-session field defaults; start_new_session copies these into the
+# existing session dict in place instead of rebuilding the literal
+_NEW_SESSION_TEMPLATE = {
+    'api_requests_count': 0,
+    'last_processed_directory': None,
+    'stop_reason': None,
+    'files_processed': 0,
+    'files_uploaded': 0,
+    'files_failed': 0
+}
+
+# Keys every loadable snapshot must carry (built once, not per load)
+_REQUIRED_STATE_KEYS = frozenset({
+    'base_directory', 'state_version', 'created_at',
+    'current_session', 'uploaded_files', 'failed_uploads', 'created_albums'
+})
+
+def read_snapshot(state_file: str) -> Dict[str, Any]:
+    """
+    Read and parse a state snapshot regardless of on-disk format
+    (zstd-compressed or plain JSON). For read-only consumers like the
+    list-states command that don't need a full BackupState.
+    """
+    with open(state_file, 'rb') as f:
+        raw = f.read()
+    if raw[:4] == _ZSTD_MAGIC:
+        if _zstd is None:
+            raise ValueError("snapshot is zstd-compressed but "
+                             "zstandard is not installed")
+        raw = _zstd.ZstdDecompressor().decompress(raw)
+    return _json_loads(raw)
+
+def _fsync_dir(path: str):
+    """
+    fsync a directory so a preceding os.replace survives a crash — the
+    rename lives in the directory, not the file. POSIX only; Windows
+    can't open directories and flushes renames itself.
+    """
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    try:
+        dir_fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+def _as_upload_record(info) -> tuple:
+    """
+    Normalize a loaded uploaded-file record to the in-memory tuple form
+    (uploaded_at, media_item_id, album_id, content_hash). Accepts the old
+    per-file dict layout as well as the JSON-array form the sidecar writes.
+    """
+    if isinstance(info, dict):
+        return (info.get('uploaded_at', ''), info.get('media_item_id'),
+                info.get('album_id'), info.get('content_hash'))
+    record = tuple(info)
+    if len(record) < 4:
+        record += (None,) * (4 - len(record))
+    return record
+
+def _album_key(name: str) -> str:
+    """
+    Canonical created-albums key: stripped and casefolded. Casing or
+    stray whitespace differences in directory names otherwise grow
+    duplicate entries — and each duplicate costs a create-album API
+    call on a repeat run.
+    """
+    return name.strip().casefold()
+
 class BackupState:
     """Manages the backup state for a specific directory"""
     
     def __init__(self, base_directory: str):
         self.base_directory = os.path.abspath(base_directory)
+        # File records are keyed relative to the base directory: shorter
+        # keys to hash, compare and serialize than absolute paths that
+        # all repeat the same prefix
+        self._base_prefix = self.base_directory + os.sep
         self.state_file = get_state_filepath(self.base_directory)
+        self.journal_file = self.state_file + '.journal'
+        self.quota_file = self.state_file + '.quota'
+        # Compacted per-file records (JSONL, one line per file) — kept out
+        # of the main snapshot so counter-only saves stay O(1)
+        self.files_file = self.state_file + '.files'
+        # Concurrent upload workers all save through the same instance
+        self._save_lock = threading.Lock()
+        self._journal_fp = None
+        # True whenever in-memory state differs from the snapshot on disk;
+        # save_state() is a no-op while clean
+        self.dirty = False
         self.state_data = self._load_or_create_state()
+        # True when uploaded_files/failed_uploads changed since the last
+        # compaction — only then does save_state rewrite the files sidecar.
+        # Old-format snapshots carried the collections inline; flag them
+        # dirty so the first save migrates them out.
+        self._files_dirty = bool(self.state_data['uploaded_files']
+                                 or self.state_data['failed_uploads'])
+        self._load_files_sidecar()
+        # Migrate any absolute keys left by pre-1.1 states
+        self._normalize_path_keys()
+        # Re-key created albums from older raw-name states
+        self._normalize_album_keys()
+        # Quota counters adjusted via the sidecar override the snapshot
+        self._load_quota_sidecar()
+        # Hot counters live as plain ints — bumped on every file/request,
+        # so the dict hops through state_data would add up. They're synced
+        # back into state_data by _sync_counters_into_state() before saves.
+        session = self.state_data['current_session']
+        self._session_requests: int = session['api_requests_count']
+        self._files_processed: int = session['files_processed']
+        self._files_uploaded: int = session['files_uploaded']
+        self._files_failed: int = session['files_failed']
+        self._daily_requests: int = self.state_data['daily_quota']['total_requests']
+        # Debounce bookkeeping for maybe_save()
+        self._last_save_time = time.monotonic()
+        self._ops_since_save = 0
+        # Hash of the last snapshot content actually written — lets
+        # save_state skip byte-identical rewrites entirely
+        self._last_payload_hash: Optional[int] = None
+        # Epoch timestamp of the next Pacific midnight; until it passes,
+        # the daily-quota rollover check is a single clock compare.
+        # 0.0 means "not computed yet" (recomputed on first check)
+        self._next_rollover_epoch: float = 0.0
+        # Whatever happens, flush a final snapshot on interpreter exit so
+        # a clean shutdown never depends on callers remembering save_state()
+        atexit.register(self.save_state)
+        # Set-backed index over uploaded_files: O(1) membership checks and
+        # counts without materializing the keys on every call
+        self._uploaded: Set[str] = set(self.state_data['uploaded_files'].keys())
+        # Content-hash index for --dedup-by-content: hash -> media item ID
+        self._uploaded_hashes: Dict[str, str] = {}
+        for info in self.state_data['uploaded_files'].values():
+            if info[3]:
+                self._uploaded_hashes[info[3]] = info[1]
+        # Fold in any journal left behind by a crashed/killed run
+        self._replay_journal()
     
     def _load_or_create_state(self) -> Dict[str, Any]:
         """Load existing state or create new state structure"""
@@ -31,9 +203,45 @@ class BackupState:
         
         if os.path.exists(self.state_file):
             try:
-                with open(self.state_file, 'r', encoding='utf-8') as f:
-                    state = json.load(f)
-                
+                # Parse straight out of a memory map — no Python-level
+                # read loop copying the file into an intermediate bytes
+                # object first (empty files can't be mapped)
+                with open(self.state_file, 'rb') as f:
+                    if os.path.getsize(self.state_file) > 0:
+                        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                        try:
+                            view = memoryview(mm)
+                            try:
+                                if bytes(view[:4]) == _ZSTD_MAGIC:
+                                    if _zstd is None:
+                                        raise ValueError(
+                                            "snapshot is zstd-compressed but "
+                                            "zstandard is not installed")
+                                    raw = _zstd.ZstdDecompressor().decompress(
+                                        view.tobytes())
+                                    state = _json_loads(raw)
+                                else:
+                                    try:
+                                        state = _json_loads(view)
+                                    except TypeError:
+                                        # stdlib json can't parse a buffer object
+                                        state = _json_loads(view.tobytes())
+                            finally:
+                                view.release()
+                        finally:
+                            mm.close()
+                    else:
+                        state = _json_loads(f.read())
+
+                # New-format snapshots keep the per-file collections in the
+                # .files sidecar; materialize empty dicts for them here.
+                # Old inline entries are normalized to the tuple layout.
+                state['uploaded_files'] = {
+                    path: _as_upload_record(info)
+                    for path, info in (state.get('uploaded_files') or {}).items()
+                }
+                state.setdefault('failed_uploads', {})
+
                 # Validate state structure
                 if self._validate_state(state):
                     logger.info(f"Loaded existing state from {self.state_file}")
@@ -42,7 +250,7 @@ class BackupState:
                     logger.warning(f"Invalid state file structure, creating new state")
                     return self._create_new_state()
                     
-            except (json.JSONDecodeError, FileNotFoundError) as e:
+            except (ValueError, FileNotFoundError) as e:
                 logger.warning(f"Failed to load state file: {e}, creating new state")
                 return self._create_new_state()
         else:
@@ -51,12 +259,7 @@ class BackupState:
     
     def _validate_state(self, state: Dict[str, Any]) -> bool:
         """Validate state file structure"""
-        required_keys = [
-            'base_directory', 'state_version', 'created_at', 
-            'current_session', 'uploaded_files', 'failed_uploads', 'created_albums'
-        ]
-        
-        if not all(key in state for key in required_keys):
+        if not _REQUIRED_STATE_KEYS.issubset(state):
             return False
         
         # Check if base directory matches
@@ -68,7 +271,8 @@ class BackupState:
     
     def _create_new_state(self) -> Dict[str, Any]:
         """Create a new state structure"""
-        now = get_utc_now().isoformat()
+        now = _now_iso()
+        self.dirty = True
         
         return {
             'base_directory': self.base_directory,
@@ -97,72 +301,409 @@ class BackupState:
         }
     
     def save_state(self):
-        """Save current state to file"""
-        try:
-            self.state_data['last_updated'] = get_utc_now().isoformat()
-            
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
-            
-            # Write state file atomically
-            temp_file = self.state_file + '.tmp'
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(self.state_data, f, indent=2, ensure_ascii=False)
-            
-            # Atomic move
-            os.replace(temp_file, self.state_file)
-            logger.debug(f"State saved to {self.state_file}")
-            
-        except Exception as e:
-            logger.error(f"Failed to save state: {e}")
-            # Clean up temp file if it exists
-            if os.path.exists(temp_file):
+        """Save a full state snapshot to file (and compact the journal)"""
+        with self._save_lock:
+            if not self.dirty:
+                logger.debug("State unchanged, skipping save")
+                return
+            try:
+                self._sync_counters_into_state()
+
+                # The state directory was created at init
+                # (ensure_directories_exist) — no makedirs per save
+
+                # Compact the per-file collections first, so a crash
+                # between the two writes is still covered by the journal
+                if self._files_dirty:
+                    self._write_files_sidecar()
+
+                # The snapshot itself carries only the small stuff —
+                # session/quota counters, album cache, history
+                snapshot = {k: v for k, v in self.state_data.items()
+                            if k not in ('uploaded_files', 'failed_uploads')}
+
+                # Skip the write when the content (minus last_updated)
+                # is byte-identical to what's already on disk
+                probe = _json_dumps({k: v for k, v in snapshot.items()
+                                     if k != 'last_updated'})
+                payload_hash = hash(probe)
+                if (payload_hash == self._last_payload_hash
+                        and os.path.exists(self.state_file)):
+                    logger.debug("Snapshot content unchanged, skipping write")
+                    self._truncate_journal()
+                    self.dirty = False
+                    self._files_dirty = False
+                    self._last_save_time = time.monotonic()
+                    self._ops_since_save = 0
+                    return
+
+                # Stamp last_updated only on a real write so the hash
+                # comparison above stays meaningful
+                self.state_data['last_updated'] = _now_iso()
+                snapshot['last_updated'] = self.state_data['last_updated']
+
+                # Write state file atomically (compact bytes: the snapshot
+                # is machine-read only, indentation would double its size)
+                # Unbuffered: the serializer already hands us one bytes
+                # blob, so this is a single write syscall with no copy
+                # through a BufferedWriter
+                temp_file = self.state_file + '.tmp'
+                payload = _json_dumps(snapshot)
+                if _ZSTD_CCTX is not None:
+                    payload = _ZSTD_CCTX.compress(payload)
+                with open(temp_file, 'wb', buffering=0) as f:
+                    f.write(payload)
+                    os.fsync(f.fileno())
+
+                # Atomic move, then flush the rename itself
+                os.replace(temp_file, self.state_file)
+                _fsync_dir(os.path.dirname(self.state_file))
+                logger.debug(f"State saved to {self.state_file}")
+
+                # Everything journaled so far is now in the snapshot, as
+                # are the quota counters — drop both sidecars
+                self._truncate_journal()
+                self._remove_quota_sidecar()
+                self.dirty = False
+                self._files_dirty = False
+                self._last_save_time = time.monotonic()
+                self._ops_since_save = 0
+                self._last_payload_hash = payload_hash
+
+            except Exception as e:
+                logger.error(f"Failed to save state: {e}")
+                # Clean up the temp file EAFP-style: one syscall, no
+                # exists()-then-remove race. UnboundLocalError covers a
+                # failure before temp_file was even assigned.
                 try:
                     os.remove(temp_file)
-                except:
+                except (FileNotFoundError, UnboundLocalError, OSError):
                     pass
+
+    def maybe_save(self, min_interval: float = 5.0, min_ops: int = 50):
+        """
+        Save a snapshot only if enough time has passed AND enough updates
+        have accumulated since the last one. The journal already makes
+        every update durable, so intermediate snapshots are purely about
+        keeping replay-on-restart short — no need to rewrite the file for
+        every directory.
+        """
+        if not self.dirty:
+            return
+        if (time.monotonic() - self._last_save_time >= min_interval
+                and self._ops_since_save >= min_ops):
+            self.save_state()
+
+    def _sync_counters_into_state(self):
+        """Write the int counter attributes back into state_data"""
+        session = self.state_data['current_session']
+        session['api_requests_count'] = self._session_requests
+        session['files_processed'] = self._files_processed
+        session['files_uploaded'] = self._files_uploaded
+        session['files_failed'] = self._files_failed
+        self.state_data['daily_quota']['total_requests'] = self._daily_requests
+
+    def append_entry(self, kind: str, payload: Dict[str, Any]):
+        """
+        Durably record one incremental update as a JSON line in the journal.
+        O(1) I/O per update, instead of rewriting the whole state file;
+        save_state() folds the journal into a snapshot and truncates it.
+        """
+        entry = {'kind': kind, 'at': _now_iso(), 'data': payload}
+        self.dirty = True
+        self._ops_since_save += 1
+        with self._save_lock:
+            try:
+                if self._journal_fp is None:
+                    os.makedirs(os.path.dirname(self.journal_file), exist_ok=True)
+                    # Line buffering: each entry hits the OS as it's written
+                    self._journal_fp = open(self.journal_file, 'a',
+                                            encoding='utf-8', buffering=1)
+                self._journal_fp.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            except Exception as e:
+                logger.error(f"Failed to append journal entry: {e}")
+
+    def _replay_journal(self):
+        """Apply journal entries left over from a run that never compacted"""
+        if not os.path.exists(self.journal_file):
+            return
+
+        applied = 0
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = _json_loads(line)
+                    except ValueError:
+                        # A crash mid-write can leave a truncated last line
+                        logger.warning("Skipping corrupt journal line")
+                        continue
+                    self._apply_journal_entry(entry.get('kind'), entry.get('data') or {})
+                    applied += 1
+        except Exception as e:
+            logger.error(f"Failed to replay journal: {e}")
+            return
+
+        if applied:
+            logger.info(f"Replayed {applied} journal entries from {self.journal_file}")
+            # Compact right away so a second crash doesn't replay twice
+            self.dirty = True
+            self.save_state()
+
+    def _apply_journal_entry(self, kind: Optional[str], data: Dict[str, Any]):
+        """Re-apply a single journaled update to the in-memory state"""
+        if kind == 'file_uploaded':
+            self._record_file_uploaded(
+                self._to_rel(data.get('file_path') or ''), data.get('media_item_id'),
+                data.get('album_id'), data.get('uploaded_at', ''),
+                data.get('content_hash')
+            )
+        elif kind == 'files_uploaded_bulk':
+            uploaded_at = data.get('uploaded_at', '')
+            for item in data.get('items') or []:
+                file_path, media_item_id, album_id, content_hash = item
+                self._record_file_uploaded(
+                    self._to_rel(file_path or ''), media_item_id,
+                    album_id, uploaded_at, content_hash
+                )
+        elif kind == 'file_failed':
+            self._record_file_failed(
+                self._to_rel(data.get('file_path') or ''), data.get('error', 'Unknown error'),
+                data.get('attempts', 1), data.get('at', '')
+            )
+        elif kind == 'album_created':
+            if data.get('album_name') and data.get('album_id'):
+                self.state_data['created_albums'][_album_key(data['album_name'])] = [
+                    sys.intern(data['album_name']), sys.intern(data['album_id'])]
+        elif kind == 'dir_done':
+            self.state_data['current_session']['last_processed_directory'] = \
+                data.get('directory')
+        elif kind == 'api_requests':
+            # Session counters restart each run; only daily quota carries over
+            self._daily_requests += data.get('count', 0)
+        else:
+            logger.debug(f"Unknown journal entry kind: {kind}")
+
+    def _to_rel(self, file_path: str) -> str:
+        """Canonical state key for a path: relative to base_directory"""
+        if file_path.startswith(self._base_prefix):
+            return file_path[len(self._base_prefix):]
+        return file_path
+
+    def _to_abs(self, state_key: str) -> str:
+        """Absolute path for a state key (paths outside base pass through)"""
+        if os.path.isabs(state_key):
+            return state_key
+        return os.path.join(self.base_directory, state_key)
+
+    def _normalize_path_keys(self):
+        """Rewrite absolute file keys from pre-1.1 states to relative form"""
+        for key in ('uploaded_files', 'failed_uploads'):
+            entries = self.state_data[key]
+            if any(p.startswith(self._base_prefix) for p in entries):
+                self.state_data[key] = {
+                    self._to_rel(p): info for p, info in entries.items()
+                }
+                self.dirty = True
+                self._files_dirty = True
+
+    def _normalize_album_keys(self):
+        """
+        One-time migration: older states keyed created_albums by the raw
+        name straight to the album ID. Re-key to the normalized form with
+        [display_name, album_id] values so case/whitespace variants of
+        the same name collapse into one entry.
+        """
+        albums = self.state_data['created_albums']
+        if any(isinstance(value, str) for value in albums.values()):
+            normalized = {}
+            for key, value in albums.items():
+                if isinstance(value, str):
+                    normalized[_album_key(key)] = [sys.intern(key),
+                                                   sys.intern(value)]
+                else:
+                    normalized[key] = value
+            self.state_data['created_albums'] = normalized
+            self.dirty = True
+
+    def _load_files_sidecar(self):
+        """Load the compacted per-file records (one JSON line per file)"""
+        if not os.path.exists(self.files_file):
+            return
+        try:
+            with open(self.files_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = _json_loads(line)
+                    except ValueError:
+                        logger.warning("Skipping corrupt files-sidecar line")
+                        continue
+                    path = record.get('path')
+                    info = record.get('info')
+                    if not path or info is None:
+                        continue
+                    if record.get('op') == 'fail':
+                        self.state_data['failed_uploads'][path] = info
+                    else:
+                        self.state_data['uploaded_files'][path] = _as_upload_record(info)
+        except Exception as e:
+            logger.error(f"Failed to load files sidecar: {e}")
+
+    def _write_files_sidecar(self):
+        """Rewrite the compacted per-file records atomically"""
+        # Accumulate all lines in one bytearray and write them with a
+        # single syscall instead of one buffered write per record
+        buf = bytearray()
+        for path, info in self.state_data['uploaded_files'].items():
+            buf += _json_dumps({'op': 'up', 'path': path, 'info': list(info)})
+            buf += b'\n'
+        for path, info in self.state_data['failed_uploads'].items():
+            buf += _json_dumps({'op': 'fail', 'path': path, 'info': info})
+            buf += b'\n'
+        temp_file = self.files_file + '.tmp'
+        with open(temp_file, 'wb', buffering=0) as f:
+            f.write(buf)
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.files_file)
+        _fsync_dir(os.path.dirname(self.files_file))
+        logger.debug(f"Compacted file records to {self.files_file}")
+
+    def update_quota_only(self, daily: Optional[int] = None, session: Optional[int] = None):
+        """
+        Adjust quota counters and persist just them to a small sidecar
+        file. The reset/set-usage CLI paths run at startup, right after
+        the (possibly huge) snapshot was read — rewriting it to change
+        two integers is pointless I/O. The sidecar is folded back into
+        the snapshot (and removed) by the next full save_state().
+        """
+        if daily is not None:
+            self._daily_requests = daily
+            self.state_data['daily_quota'] = {
+                'date': get_pacific_date_string(),
+                'total_requests': daily,
+                'reset_at': get_pacific_datetime_string(),
+                'timezone': 'Pacific'
+            }
+        if session is not None:
+            self._session_requests = session
+            self.state_data['current_session']['api_requests_count'] = session
+
+        payload = {
+            'daily_quota': self.state_data['daily_quota'],
+            'session_requests': self._session_requests
+        }
+
+        with self._save_lock:
+            try:
+                os.makedirs(os.path.dirname(self.quota_file), exist_ok=True)
+                temp_file = self.quota_file + '.tmp'
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(payload, f, indent=2)
+                os.replace(temp_file, self.quota_file)
+                logger.debug(f"Quota sidecar saved to {self.quota_file}")
+            except Exception as e:
+                logger.error(f"Failed to save quota sidecar: {e}")
+
+    def _load_quota_sidecar(self):
+        """Overlay quota counters saved by update_quota_only, if present"""
+        if not os.path.exists(self.quota_file):
+            return
+        try:
+            with open(self.quota_file, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Ignoring unreadable quota sidecar: {e}")
+            return
+
+        daily_quota = payload.get('daily_quota')
+        if daily_quota:
+            self.state_data['daily_quota'] = daily_quota
+        if 'session_requests' in payload:
+            self.state_data['current_session']['api_requests_count'] = \
+                payload['session_requests']
+        logger.debug(f"Applied quota sidecar from {self.quota_file}")
+
+    def _remove_quota_sidecar(self):
+        """Drop the quota sidecar once its counters are in a snapshot"""
+        try:
+            os.remove(self.quota_file)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Failed to remove quota sidecar: {e}")
+
+    def _truncate_journal(self):
+        """Drop the journal after its contents landed in a snapshot"""
+        if self._journal_fp is not None:
+            try:
+                self._journal_fp.close()
+            except Exception:
+                pass
+            self._journal_fp = None
+        try:
+            os.remove(self.journal_file)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Failed to remove journal file: {e}")
     
     def start_new_session(self):
         """Start a new backup session"""
-        now = get_utc_now().isoformat()
-        
-        self.state_data['current_session'] = {
-            'start_time': now,
-            'api_requests_count': 0,
-            'last_processed_directory': None,
-            'stop_reason': None,
-            'files_processed': 0,
-            'files_uploaded': 0,
-            'files_failed': 0
-        }
-        
-        # Update daily quota if it's a new Pacific day
+        # Reset in place from the shared template: no fresh dict, and any
+        # extra session fields added elsewhere survive untouched
+        session = self.state_data['current_session']
+        session.update(_NEW_SESSION_TEMPLATE)
+        session['start_time'] = _now_iso()
+        self._session_requests = 0
+        self._files_processed = 0
+        self._files_uploaded = 0
+        self._files_failed = 0
+
+        # Update daily quota if it's a new Pacific day (fresh sessions
+        # always take the full check, not the cached-rollover fast path)
+        self._next_rollover_epoch = 0.0
         self._check_and_reset_daily_quota_if_needed()
-        
+
+        self.dirty = True
         self.save_state()
         logger.info("Started new backup session")
     
     def add_api_request(self, count: int = 1):
         """Add to API request count"""
-        self.state_data['current_session']['api_requests_count'] += count
-        self.state_data['daily_quota']['total_requests'] += count
+        self._session_requests += count
+        self._daily_requests += count
+        self.append_entry('api_requests', {'count': count})
     
     def _check_and_reset_daily_quota_if_needed(self) -> bool:
         """
         Check if Pacific date has changed and reset daily quota if needed.
         Returns True if quota was reset, False otherwise.
         """
+        # Fast path: until the cached next-midnight instant passes, the
+        # Pacific date cannot have changed — one clock read instead of a
+        # timezone conversion per API request
+        if time.time() < self._next_rollover_epoch:
+            return False
+
         # Migrate old state files that don't have Pacific date format
         self._migrate_daily_quota_to_pacific_if_needed()
-        
+
         stored_date = self.get_quota_date()
         has_changed, current_date = has_pacific_date_changed(stored_date)
-        
+
         if has_changed:
             self._reset_daily_quota(current_date, stored_date)
-            return True
-        
-        return False
+
+        # +1s slack so the next slow check runs strictly after midnight
+        self._next_rollover_epoch = (time.time()
+                                     + seconds_until_pacific_midnight() + 1)
+        return has_changed
     
     def _migrate_daily_quota_to_pacific_if_needed(self):
         """Migrate old UTC-based daily quota to Pacific time format"""
@@ -183,16 +724,20 @@ class BackupState:
             if 'quota_resets' not in self.state_data:
                 self.state_data['quota_resets'] = []
             
+            self.dirty = True
+            # The stored date just changed — force the next rollover
+            # check back through the slow path
+            self._next_rollover_epoch = 0.0
             logger.info(f"Migrated state file to Pacific timezone. New date: {current_pacific_date}")
     
     def _reset_daily_quota(self, new_pacific_date: str, previous_date: str):
         """Reset daily quota when Pacific date changes"""
-        session_count = self.state_data['current_session']['api_requests_count']
-        previous_daily_count = self.state_data['daily_quota']['total_requests']
+        session_count = self._session_requests
+        previous_daily_count = self._daily_requests
         
         # Log the reset event
         reset_info = {
-            'reset_at_utc': get_utc_now().isoformat(),
+            'reset_at_utc': _now_iso(),
             'reset_at_pacific': get_pacific_datetime_string(),
             'previous_date': previous_date,
             'new_date': new_pacific_date,
@@ -206,6 +751,7 @@ class BackupState:
         self.state_data['quota_resets'].append(reset_info)
         
         # Reset the daily quota
+        self._daily_requests = 0
         self.state_data['daily_quota'] = {
             'date': new_pacific_date,
             'total_requests': 0,
@@ -213,6 +759,8 @@ class BackupState:
             'timezone': 'Pacific'
         }
         
+        self.dirty = True
+
         # Log this important event
         safe_log('info', 
                  f"🔄 Daily quota reset! Pacific date changed from {previous_date} to {new_pacific_date}")
@@ -233,83 +781,200 @@ class BackupState:
     def set_last_processed_directory(self, directory: str):
         """Set the last processed directory"""
         self.state_data['current_session']['last_processed_directory'] = directory
-    
-    def mark_file_uploaded(self, file_path: str, media_item_id: str, album_id: Optional[str] = None):
+        self.append_entry('dir_done', {'directory': directory})
+
+    def _record_file_uploaded(self, file_path: str, media_item_id: str,
+                              album_id: Optional[str], uploaded_at: str,
+                              content_hash: Optional[str] = None):
+        """Apply an uploaded-file record to in-memory state (no journaling)"""
+        if content_hash:
+            self._uploaded_hashes[content_hash] = media_item_id
+        # Compact 4-slot tuple instead of a per-file dict — at 100k files
+        # that saves three key strings and a dict header per entry
+        self.state_data['uploaded_files'][file_path] = (
+            uploaded_at, media_item_id, album_id, content_hash)
+        self._uploaded.add(file_path)
+        self._files_dirty = True
+
+        # Remove from failed uploads if it was there (single lookup)
+        self.state_data['failed_uploads'].pop(file_path, None)
+
+    def mark_file_uploaded(self, file_path: str, media_item_id: str, album_id: Optional[str] = None,
+                           content_hash: Optional[str] = None):
         """Mark a file as successfully uploaded"""
-        now = get_utc_now().isoformat()
-        
-        self.state_data['uploaded_files'][file_path] = {
-            'uploaded_at': now,
+        file_path = self._to_rel(file_path)
+        now = _now_iso()
+        # Under the lock: concurrent directory workers insert into the
+        # same dicts that save_state serializes (an unlocked insert can
+        # abort a snapshot mid-iteration), and the unlocked counter
+        # increments could drop session stats
+        with self._save_lock:
+            self._record_file_uploaded(file_path, media_item_id, album_id, now, content_hash)
+            self._files_uploaded += 1
+        self.append_entry('file_uploaded', {
+            'file_path': file_path,
             'media_item_id': media_item_id,
-            'album_id': album_id
-        }
-        
-        self.state_data['current_session']['files_uploaded'] += 1
-        
-        # Remove from failed uploads if it was there
-        if file_path in self.state_data['failed_uploads']:
-            del self.state_data['failed_uploads'][file_path]
-    
-    def mark_file_failed(self, file_path: str, error_message: str, attempts: int = 1):
-        """Mark a file as failed to upload"""
-        now = get_utc_now().isoformat()
-        
-        if file_path in self.state_data['failed_uploads']:
-            # Update existing failed entry
-            self.state_data['failed_uploads'][file_path]['attempts'] += attempts
-            self.state_data['failed_uploads'][file_path]['last_attempt'] = now
-            self.state_data['failed_uploads'][file_path]['error'] = error_message
+            'album_id': album_id,
+            'uploaded_at': now,
+            'content_hash': content_hash
+        })
+
+    def mark_files_uploaded_bulk(self, items):
+        """
+        Mark a batch of files as uploaded in one shot: one counter update
+        and one journal line for the whole batch instead of one per file.
+
+        Args:
+            items: iterable of (file_path, media_item_id, album_id,
+                   content_hash) tuples; content_hash may be None
+        """
+        now = _now_iso()
+        recorded = []
+        # One lock acquisition for the whole batch (see mark_file_uploaded
+        # for why the records and counters need it)
+        with self._save_lock:
+            for file_path, media_item_id, album_id, content_hash in items:
+                file_path = self._to_rel(file_path)
+                self._record_file_uploaded(file_path, media_item_id, album_id,
+                                           now, content_hash)
+                recorded.append([file_path, media_item_id, album_id, content_hash])
+            if recorded:
+                self._files_uploaded += len(recorded)
+        if not recorded:
+            return
+        self.append_entry('files_uploaded_bulk',
+                          {'items': recorded, 'uploaded_at': now})
+
+    def get_media_id_for_hash(self, content_hash: str) -> Optional[str]:
+        """Look up the media item already uploaded with this content hash"""
+        return self._uploaded_hashes.get(content_hash)
+
+    def _record_file_failed(self, file_path: str, error_message: str,
+                            attempts: int, now: str):
+        """Apply a failed-file record to in-memory state (no journaling)"""
+        self._files_dirty = True
+        failed = self.state_data['failed_uploads']
+        entry = failed.get(file_path)
+        if entry is not None:
+            # Update existing failed entry (one lookup, not four)
+            entry['attempts'] += attempts
+            entry['last_attempt'] = now
+            entry['error'] = error_message
         else:
             # Create new failed entry
-            self.state_data['failed_uploads'][file_path] = {
+            failed[file_path] = {
                 'error': error_message,
                 'attempts': attempts,
                 'last_attempt': now,
                 'first_attempt': now
             }
-        
-        self.state_data['current_session']['files_failed'] += 1
-    
+
+    def mark_file_failed(self, file_path: str, error_message: str, attempts: int = 1):
+        """Mark a file as failed to upload"""
+        file_path = self._to_rel(file_path)
+        now = _now_iso()
+        with self._save_lock:
+            self._record_file_failed(file_path, error_message, attempts, now)
+            self._files_failed += 1
+        self.append_entry('file_failed', {
+            'file_path': file_path,
+            'error': error_message,
+            'attempts': attempts,
+            'at': now
+        })
+
     def increment_files_processed(self):
         """Increment the count of files processed"""
-        self.state_data['current_session']['files_processed'] += 1
+        with self._save_lock:
+            self._files_processed += 1
+            self.dirty = True
     
     def add_created_album(self, album_name: str, album_id: str):
-        """Add a created album to state"""
-        self.state_data['created_albums'][album_name] = album_id
+        """Add a created album to state (keyed by normalized name)"""
+        # Intern so the same name/ID strings are shared with the album cache.
+        # Locked: the snapshot serializer iterates this dict under the lock
+        with self._save_lock:
+            self.state_data['created_albums'][_album_key(album_name)] = [
+                sys.intern(album_name), sys.intern(album_id)]
+        self.append_entry('album_created', {'album_name': album_name, 'album_id': album_id})
     
+    def set_albums_cache(self, albums: Dict[str, str], fetched_at: float):
+        """Cache the server-side album listing so warm runs can skip albums().list"""
+        self.state_data['albums_cache'] = {
+            'albums': dict(albums),
+            'fetched_at': fetched_at
+        }
+        self.dirty = True
+
+    def get_albums_cache(self) -> Optional[Tuple[Dict[str, str], float]]:
+        """
+        Get the cached album listing, if any.
+        Returns (albums_dict, fetched_at_timestamp) or None.
+        """
+        cache = self.state_data.get('albums_cache')
+        if not cache or 'albums' not in cache or 'fetched_at' not in cache:
+            return None
+        return cache['albums'], cache['fetched_at']
+
+    def add_album_to_cache(self, album_name: str, album_id: str):
+        """Write a newly created album through to the cached listing"""
+        cache = self.state_data.get('albums_cache')
+        if cache and 'albums' in cache:
+            with self._save_lock:
+                cache['albums'][album_name] = album_id
+                self.dirty = True
+
+    def clear_albums_cache(self):
+        """Invalidate the cached album listing (forces a server refresh)"""
+        if self.state_data.pop('albums_cache', None) is not None:
+            self.dirty = True
+
     def set_stop_reason(self, reason: str):
         """Set the reason why the backup stopped"""
         self.state_data['current_session']['stop_reason'] = reason
+        self.dirty = True
         safe_log('info', f"Backup stopped: {reason}")
     
     def is_file_uploaded(self, file_path: str) -> bool:
-        """Check if a file was already uploaded"""
-        return file_path in self.state_data['uploaded_files']
-    
+        """Check if a file was already uploaded (accepts absolute paths)"""
+        return self._to_rel(file_path) in self._uploaded
+
+    @property
+    def uploaded_count(self) -> int:
+        """Number of files uploaded so far (O(1), no dict materialization)"""
+        return len(self._uploaded)
+
     def get_uploaded_files(self) -> Set[str]:
-        """Get set of all uploaded file paths"""
-        return set(self.state_data['uploaded_files'].keys())
-    
-    def get_failed_files(self) -> Dict[str, Dict[str, Any]]:
-        """Get dictionary of failed files and their error info"""
-        return self.state_data['failed_uploads'].copy()
-    
-    def get_created_albums(self) -> Dict[str, str]:
-        """Get dictionary of created albums {name: album_id}"""
-        return self.state_data['created_albums'].copy()
+        """
+        Get set of all uploaded file keys, relative to the base directory
+        (the live index — don't mutate).
+        """
+        return self._uploaded
     
+    def get_failed_files(self) -> Mapping[str, Dict[str, Any]]:
+        """Read-only view of failed files and their error info (zero-copy)"""
+        return MappingProxyType(self.state_data['failed_uploads'])
+
+    def get_created_albums(self) -> Mapping[str, List[str]]:
+        """
+        Read-only view of created albums, keyed by normalized name with
+        [display_name, album_id] values (zero-copy).
+        """
+        return MappingProxyType(self.state_data['created_albums'])
+
     def get_album_id(self, album_name: str) -> Optional[str]:
-        """Get album ID for a given album name"""
-        return self.state_data['created_albums'].get(album_name)
-    
-    def get_session_stats(self) -> Dict[str, Any]:
-        """Get current session statistics"""
-        return self.state_data['current_session'].copy()
+        """Get album ID for a given album name (case/whitespace-insensitive)"""
+        entry = self.state_data['created_albums'].get(_album_key(album_name))
+        return entry[1] if entry else None
     
+    def get_session_stats(self) -> Mapping[str, Any]:
+        """Read-only view of current session statistics (zero-copy)"""
+        self._sync_counters_into_state()
+        return MappingProxyType(self.state_data['current_session'])
+
     def get_daily_quota_usage(self) -> int:
         """Get today's total API request count"""
-        return self.state_data['daily_quota']['total_requests']
+        return self._daily_requests
     
     def get_quota_date(self) -> str:
         """Get the current quota date (Pacific time)"""
@@ -317,7 +982,7 @@ class BackupState:
     
     def get_session_request_count(self) -> int:
         """Get current session's API request count"""
-        return self.state_data['current_session']['api_requests_count']
+        return self._session_requests
     
     def get_last_processed_directory(self) -> Optional[str]:
         """Get the last processed directory"""
@@ -326,14 +991,32 @@ class BackupState:
     def clear_failed_files(self):
         """Clear the failed files list (for retry attempts)"""
         self.state_data['failed_uploads'] = {}
+        self.dirty = True
+        self._files_dirty = True
         logger.info("Cleared failed files list")
     
     def delete_state_file(self):
-        """Delete the state file (for fresh start)"""
+        """Delete the state file and its sidecars (for fresh start)"""
         try:
-            if os.path.exists(self.state_file):
+            # This instance is being discarded: drop its atexit hook and
+            # dirty flags first, or the exit-time save would rewrite the
+            # files we're about to delete and resurrect the old records
+            atexit.unregister(self.save_state)
+            self.dirty = False
+            self._files_dirty = False
+            try:
                 os.remove(self.state_file)
                 logger.info(f"Deleted state file: {self.state_file}")
+            except FileNotFoundError:
+                pass
+            try:
+                os.remove(self.files_file)
+            except FileNotFoundError:
+                pass
+            # The quota sidecar would otherwise overlay its counters onto
+            # the fresh state on the next load
+            self._remove_quota_sidecar()
+            self._truncate_journal()
         except Exception as e:
             logger.error(f"Failed to delete state file: {e}")
     
@@ -371,10 +1054,13 @@ def list_all_states() -> List[str]:
     
     states = []
     try:
-        for filename in os.listdir(STATE_DIR):
-            if filename.startswith(STATE_FILE_PREFIX) and filename.endswith(STATE_FILE_SUFFIX):
-                state_path = os.path.join(STATE_DIR, filename)
-                states.append(state_path)
+        # scandir hands back name and path together — no join per entry
+        with os.scandir(STATE_DIR) as entries:
+            for entry in entries:
+                if (entry.name.startswith(STATE_FILE_PREFIX)
+                        and entry.name.endswith(STATE_FILE_SUFFIX)
+                        and entry.is_file(follow_symlinks=False)):
+                    states.append(entry.path)
     except FileNotFoundError:
         pass
     
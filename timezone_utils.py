@@ -5,13 +5,32 @@ Handles Pacific Time (PT) for quota reset at 00:00 Pacific Time.
 Google Photos API daily quota resets at midnight Pacific Time.
 """
 
-import pytz
-from datetime import datetime, timezone
+import time
+
+from datetime import datetime, timedelta, timezone
 from typing import Tuple
 
 
-# Pacific timezone (handles PST/PDT automatically)
-PACIFIC_TZ = pytz.timezone('US/Pacific')
+# Pacific timezone (handles PST/PDT automatically). Prefer the C-backed
+# stdlib zoneinfo (Python 3.9+), which skips pytz's localize/normalize
+# dance; fall back to pytz on older interpreters or setups without a
+# timezone database.
+try:
+    from zoneinfo import ZoneInfo
+    PACIFIC_TZ = ZoneInfo('America/Los_Angeles')
+    _USING_PYTZ = False
+except Exception:
+    import pytz
+    PACIFIC_TZ = pytz.timezone('US/Pacific')
+    _USING_PYTZ = True
+
+# Memoized "current time" strings. The quota-reset check runs these on
+# every API request, and a pytz conversion (DST rule lookup) + strftime
+# per call adds up. Dates are cached per minute, timestamps per second.
+_date_cache = (0, '')
+_datetime_cache = (0, '')
+_logging_cache = (0, '')
+_utc_iso_cache = (0, '')
 
 
 def get_pacific_now() -> datetime:
@@ -24,6 +43,22 @@ def get_utc_now() -> datetime:
     return datetime.now(timezone.utc)
 
 
+def get_utc_now_iso() -> str:
+    """
+    Current UTC time as an ISO string, recomputed at most once per
+    second. Bookkeeping fields (upload timestamps, journal entries) use
+    this instead of paying datetime construction + formatting per call.
+    """
+    global _utc_iso_cache
+    second = int(time.time())
+    cached_second, cached_value = _utc_iso_cache
+    if second == cached_second and cached_value:
+        return cached_value
+    value = datetime.now(timezone.utc).isoformat()
+    _utc_iso_cache = (second, value)
+    return value
+
+
 def get_pacific_date_string(dt: datetime = None) -> str:
     """
     Get Pacific date as ISO string (YYYY-MM-DD)
@@ -35,11 +70,18 @@ def get_pacific_date_string(dt: datetime = None) -> str:
         Date string in Pacific timezone (e.g., '2025-09-08')
     """
     if dt is None:
-        dt = get_pacific_now()
-    elif dt.tzinfo is None:
+        global _date_cache
+        minute = int(time.time()) // 60
+        cached_minute, cached_value = _date_cache
+        if minute == cached_minute and cached_value:
+            return cached_value
+        value = get_pacific_now().date().isoformat()
+        _date_cache = (minute, value)
+        return value
+    if dt.tzinfo is None:
         # Assume UTC if no timezone info
         dt = dt.replace(tzinfo=timezone.utc)
-    
+
     # Convert to Pacific time
     pacific_dt = dt.astimezone(PACIFIC_TZ)
     return pacific_dt.date().isoformat()
@@ -56,11 +98,18 @@ def get_pacific_datetime_string(dt: datetime = None) -> str:
         Datetime string in Pacific timezone (e.g., '2025-09-08T15:30:45-07:00')
     """
     if dt is None:
-        dt = get_pacific_now()
-    elif dt.tzinfo is None:
+        global _datetime_cache
+        second = int(time.time())
+        cached_second, cached_value = _datetime_cache
+        if second == cached_second and cached_value:
+            return cached_value
+        value = get_pacific_now().isoformat()
+        _datetime_cache = (second, value)
+        return value
+    if dt.tzinfo is None:
         # Assume UTC if no timezone info
         dt = dt.replace(tzinfo=timezone.utc)
-    
+
     # Convert to Pacific time
     pacific_dt = dt.astimezone(PACIFIC_TZ)
     return pacific_dt.isoformat()
@@ -78,14 +127,23 @@ def format_pacific_time_for_logging(dt: datetime = None, include_timezone: bool
         Formatted string for logging (e.g., '2025-09-08 15:30:45 PDT')
     """
     if dt is None:
+        if include_timezone:
+            global _logging_cache
+            second = int(time.time())
+            cached_second, cached_value = _logging_cache
+            if second == cached_second and cached_value:
+                return cached_value
+            value = get_pacific_now().strftime('%Y-%m-%d %H:%M:%S %Z')
+            _logging_cache = (second, value)
+            return value
         dt = get_pacific_now()
     elif dt.tzinfo is None:
         # Assume UTC if no timezone info
         dt = dt.replace(tzinfo=timezone.utc)
-    
+
     # Convert to Pacific time
     pacific_dt = dt.astimezone(PACIFIC_TZ)
-    
+
     if include_timezone:
         # Format with timezone abbreviation (PST or PDT)
         return pacific_dt.strftime('%Y-%m-%d %H:%M:%S %Z')
@@ -138,16 +196,15 @@ def get_next_pacific_midnight() -> datetime:
         datetime object representing next midnight Pacific time
     """
     pacific_now = get_pacific_now()
-    
-    # Get tomorrow's date in Pacific time
-    tomorrow = pacific_now.date().replace(day=pacific_now.day + 1)
-    
+
+    # Get tomorrow's date in Pacific time (timedelta handles month ends)
+    tomorrow = pacific_now.date() + timedelta(days=1)
+
     # Create midnight datetime in Pacific timezone
-    midnight_pacific = PACIFIC_TZ.localize(
-        datetime.combine(tomorrow, datetime.min.time())
-    )
-    
-    return midnight_pacific
+    midnight = datetime.combine(tomorrow, datetime.min.time())
+    if _USING_PYTZ:
+        return PACIFIC_TZ.localize(midnight)
+    return midnight.replace(tzinfo=PACIFIC_TZ)
 
 
 def seconds_until_pacific_midnight() -> int:
@@ -2,16 +2,23 @@
 
 import os
 import logging
-from typing import Optional, Tuple, List
+import random
+import stat as stat_module
+from typing import Dict, Optional, Tuple, List
 import time
+import mmap
+import threading
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
 import requests
+from requests.adapters import HTTPAdapter
 
 from config import (
     is_supported_file, is_image_file, is_video_file, get_max_file_size,
-    MAX_RETRIES, RETRY_DELAY, BACKOFF_FACTOR, UPLOAD_CHUNK_SIZE
+    MAX_RETRIES, BACKOFF_SCHEDULE, UPLOAD_CHUNK_SIZE,
+    MEDIA_BATCH_SIZE
 )
 from safe_logging import safe_log
 from state_manager import BackupState
@@ -19,6 +26,70 @@ from quota_tracker import QuotaTracker
 
 logger = logging.getLogger(__name__)
 
+# Content hashing for --dedup-by-content: prefer xxhash/blake3 if installed
+# (SIMD-accelerated, multi-GB/s), fall back to stdlib blake2b otherwise
+try:
+    import xxhash
+    _new_hasher = xxhash.xxh3_128
+except ImportError:
+    try:
+        import blake3
+        _new_hasher = blake3.blake3
+    except ImportError:
+        from hashlib import blake2b
+
+        def _new_hasher():
+            return blake2b(digest_size=16)
+
+def compute_content_hash(file_path: str) -> Optional[str]:
+    """
+    Hash a file's contents for dedup lookups.
+    Memory-maps the file so hashing reads straight from the page cache
+    instead of copying through Python bytes objects.
+    Returns a hex digest, or None if the file can't be read.
+    """
+    try:
+        hasher = _new_hasher()
+        with open(file_path, 'rb') as f:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    hasher.update(mm)
+            except (ValueError, OSError):
+                # Empty files (and platforms without mmap support) fall
+                # back to chunked reads
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    hasher.update(chunk)
+        return hasher.hexdigest()
+    except OSError as e:
+        logger.error(f"Cannot hash {file_path}: {e}")
+        return None
+
+# How long to trust a just-refreshed OAuth token without re-checking:
+# 55 minutes of its 60-minute life, leaving margin for clock skew
+_TOKEN_FRESH_SECONDS = 3300
+
+# Extension -> MIME type, built once at import. A dict probe replaces
+# the old if/elif ladder and keeps the mapping data instead of code.
+_MIME_TYPES = {
+    # Images
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.bmp': 'image/bmp',
+    '.webp': 'image/webp',
+    '.heic': 'image/heic',
+    '.heif': 'image/heic',
+    # Videos
+    '.mp4': 'video/mp4',
+    '.mov': 'video/quicktime',
+    '.avi': 'video/x-msvideo',
+    '.mkv': 'video/x-matroska',
+    '.m4v': 'video/x-m4v',
+    '.webm': 'video/webm',
+    '.3gp': 'video/3gpp',
+}
+
 class UploadResult:
     """Result of a file upload operation"""
     
@@ -32,14 +103,99 @@ class UploadResult:
 class MediaUploader:
     """Handles uploading media files to Google Photos"""
     
-    def __init__(self, service, state: BackupState, quota_tracker: QuotaTracker):
+    def __init__(self, service, state: BackupState, quota_tracker: QuotaTracker,
+                 pool_size: int = 5, dedup_by_content: bool = False):
         self.service = service
         self.state = state
         self.quota = quota_tracker
+        self.dedup_by_content = dedup_by_content
         self.total_files_to_upload = 0  # Set by set_total_files_count method
         self.current_directory_files = 0  # Current directory file count
         self.current_directory_uploaded = 0  # Files uploaded in current directory
+        # Shared session with a connection pool sized for concurrent uploads;
+        # keep-alive avoids re-doing TLS per file
+        self._pool_size = pool_size
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount('https://', adapter)
+        # One executor for the life of the uploader, sized to match the
+        # adapter pool above. With several directories in flight, per-call
+        # executors would multiply (workers × pool_size byte uploads at
+        # once) and overrun the connection pool; this caps total in-flight
+        # POSTs at pool_size no matter how many directories share it.
+        # concurrent.futures joins the threads at interpreter exit.
+        self._upload_pool = ThreadPoolExecutor(max_workers=pool_size,
+                                               thread_name_prefix='upload-bytes')
+        # Serializes credential refreshes: with pool_size workers hitting
+        # an expired token at once, only one should do the HTTPS round
+        # trip to the token endpoint — the rest wait and reuse its result
+        self._refresh_lock = threading.Lock()
+        # Monotonic deadline until which the token is known-good; while
+        # it holds, the per-file freshness check is one float compare
+        # instead of google.auth's datetime comparison
+        self._token_fresh_until = 0.0
+
+    def _ensure_fresh_token(self) -> bool:
+        """
+        Make sure the OAuth token is usable, refreshing it if needed.
+        Fast path is a single monotonic-clock compare; the refresh
+        itself is deduplicated across workers via the shared lock.
+        Returns True if the credentials are fresh on exit.
+        """
+        if time.monotonic() < self._token_fresh_until:
+            return True
+        with self._refresh_lock:
+            # A neighbor may have refreshed while we waited for the lock
+            if time.monotonic() < self._token_fresh_until:
+                return True
+            credentials = self.service._http.credentials
+            if not credentials.expired:
+                # Still valid — trust it for a short window before
+                # consulting the datetime machinery again
+                self._token_fresh_until = time.monotonic() + 60
+                return True
+            try:
+                from google.auth.transport.requests import Request
+                credentials.refresh(Request())
+                self._token_fresh_until = time.monotonic() + _TOKEN_FRESH_SECONDS
+                logger.debug("Token refreshed successfully")
+                return True
+            except Exception as e:
+                logger.error(f"Failed to refresh token: {e}")
+                return False
     
+    def _sleep_backoff(self, attempt: int) -> float:
+        """
+        Sleep with half-jittered exponential backoff (precomputed, capped
+        schedule). Jitter keeps pool workers from retrying in lockstep
+        after a shared failure.
+        Returns the number of seconds slept.
+        """
+        base = BACKOFF_SCHEDULE[min(attempt, len(BACKOFF_SCHEDULE) - 1)]
+        wait_time = random.uniform(base * 0.5, base)
+        logger.debug("Backing off %.1fs (attempt %d)", wait_time, attempt + 1)
+        time.sleep(wait_time)
+        return wait_time
+
+    def _sleep_rate_limited(self, attempt: int, retry_after) -> float:
+        """
+        Sleep after a 429. Honors the server-provided Retry-After delta
+        when parseable (sleeping less wastes a guaranteed-fail retry,
+        sleeping more wastes wall time), otherwise falls back to
+        jittered backoff.
+        Returns the number of seconds slept.
+        """
+        if retry_after:
+            try:
+                wait_time = max(0.0, float(retry_after))
+            except (TypeError, ValueError):
+                pass
+            else:
+                logger.warning(f"Server requested Retry-After {wait_time:.0f}s, waiting...")
+                time.sleep(wait_time)
+                return wait_time
+        return self._sleep_backoff(attempt)
+
     def set_total_files_count(self, total_files: int):
         """Set the total number of files to upload for progress tracking"""
         self.total_files_to_upload = total_files
@@ -61,31 +217,25 @@ class MediaUploader:
             UploadResult with success status and details
         """
         try:
+            # One path parse for the whole upload (logs + request bodies)
+            filename = os.path.basename(file_path)
+
             # Validate file
             validation_result = self._validate_file(file_path)
             if not validation_result.success:
                 return validation_result
             
             # Show progress message (for both new uploads and skipped files)
-            if self.current_directory_files > 0:
-                remaining_in_directory = self.current_directory_files - self.current_directory_uploaded
-                action = "Uploading" if not self.state.is_file_uploaded(file_path) else "Skipping"
-                logger.info(f"{action}: {os.path.basename(file_path)} ({self._format_file_size(file_path)}) - {remaining_in_directory:,} files remaining")
-            else:
-                # Fallback to global count if directory count not set
-                uploaded_count = len(self.state.get_uploaded_files())
-                remaining_files = max(0, self.total_files_to_upload - uploaded_count) if self.total_files_to_upload > 0 else 0
-                action = "Uploading" if not self.state.is_file_uploaded(file_path) else "Skipping"
-                if self.total_files_to_upload > 0:
-                    logger.info(f"{action}: {os.path.basename(file_path)} ({self._format_file_size(file_path)}) - {remaining_files:,} files remaining")
-                else:
-                    logger.info(f"{action}: {os.path.basename(file_path)} ({self._format_file_size(file_path)})")
-            
+            already_uploaded = self.state.is_file_uploaded(file_path)
+            self._log_progress(file_path, already_uploaded=already_uploaded,
+                               directory_files=self.current_directory_files,
+                               directory_uploaded=self.current_directory_uploaded)
+
             # Check if already uploaded
-            if self.state.is_file_uploaded(file_path):
+            if already_uploaded:
                 # Increment directory counter for skipped files too
                 self.current_directory_uploaded += 1
-                logger.debug(f"File already uploaded, skipped: {file_path}")
+                logger.debug("File already uploaded, skipped: %s", file_path)
                 return UploadResult(success=True, skip_reason="Already uploaded")
             
             # Check quota before upload
@@ -100,17 +250,18 @@ class MediaUploader:
                 return UploadResult(success=False, error_message="Failed to upload file bytes")
             
             # Step 2: Create media item
-            media_item_id = self._create_media_item(file_path, upload_token, album_id)
+            media_item_id = self._create_media_item(file_path, upload_token, album_id,
+                                                    filename=filename)
             if not media_item_id:
                 return UploadResult(success=False, error_message="Failed to create media item")
-            
+
             # Mark as uploaded in state
             self.state.mark_file_uploaded(file_path, media_item_id, album_id)
-            
+
             # Increment directory counter for progress tracking
             self.current_directory_uploaded += 1
-            
-            safe_log('info', f"✅ Successfully uploaded: {os.path.basename(file_path)}")
+
+            safe_log('info', f"✅ Successfully uploaded: {filename}")
             return UploadResult(success=True, media_item_id=media_item_id)
             
         except Exception as e:
@@ -118,35 +269,68 @@ class MediaUploader:
             logger.error(error_msg)
             return UploadResult(success=False, error_message=error_msg)
     
-    def _validate_file(self, file_path: str) -> UploadResult:
-        """Validate that a file can be uploaded"""
-        # Check if file exists
-        if not os.path.exists(file_path):
-            return UploadResult(success=False, error_message="File does not exist")
-        
-        if not os.path.isfile(file_path):
-            return UploadResult(success=False, error_message="Path is not a file")
-        
-        # Check if file format is supported
-        if not is_supported_file(file_path):
-            return UploadResult(success=True, skip_reason="Unsupported file format")
-        
+    def _log_progress(self, file_path: str, size: Optional[int] = None,
+                      already_uploaded: Optional[bool] = None,
+                      directory_files: int = 0, directory_uploaded: int = 0):
+        """Log per-file progress with remaining-count context"""
+        # Above INFO (production backups often run at WARNING) this whole
+        # line is waste — skip the size formatting and state probes early
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        # Callers that just checked dedup state pass the answer in so the
+        # set isn't probed a second time per file
+        if already_uploaded is None:
+            already_uploaded = self.state.is_file_uploaded(file_path)
+        action = "Skipping" if already_uploaded else "Uploading"
+        if directory_files > 0:
+            remaining_in_directory = directory_files - directory_uploaded
+            logger.info(f"{action}: {os.path.basename(file_path)} ({self._format_file_size(file_path, size)}) - {remaining_in_directory:,} files remaining")
+        else:
+            # Fallback to global count if directory count not set
+            uploaded_count = self.state.uploaded_count
+            remaining_files = max(0, self.total_files_to_upload - uploaded_count) if self.total_files_to_upload > 0 else 0
+            if self.total_files_to_upload > 0:
+                logger.info(f"{action}: {os.path.basename(file_path)} ({self._format_file_size(file_path, size)}) - {remaining_files:,} files remaining")
+            else:
+                logger.info(f"{action}: {os.path.basename(file_path)} ({self._format_file_size(file_path, size)})")
+
+    def _validate_file(self, file_path: str, size: Optional[int] = None) -> UploadResult:
+        """
+        Validate that a file can be uploaded.
+        A cached stat size from the directory scan (os.scandir) skips the
+        exists/isfile/getsize re-stats and the supported-format re-check —
+        the scan already established both before handing the file over.
+        """
+        if size is None:
+            # One stat answers existence, type and size in a single
+            # syscall (the old exists/isfile/getsize trio was three)
+            try:
+                st = os.stat(file_path)
+            except FileNotFoundError:
+                return UploadResult(success=False, error_message="File does not exist")
+            except OSError as e:
+                return UploadResult(success=False, error_message=f"Cannot access file: {e}")
+
+            if not stat_module.S_ISREG(st.st_mode):
+                return UploadResult(success=False, error_message="Path is not a file")
+
+            # Check if file format is supported
+            if not is_supported_file(file_path):
+                return UploadResult(success=True, skip_reason="Unsupported file format")
+
+            size = st.st_size
+
         # Check file size
-        try:
-            file_size = os.path.getsize(file_path)
-            max_size = get_max_file_size(file_path)
-            
-            if file_size == 0:
-                return UploadResult(success=True, skip_reason="Empty file")
-            
-            if file_size > max_size:
-                size_str = self._format_size(file_size)
-                max_str = self._format_size(max_size)
-                return UploadResult(success=True, skip_reason=f"File too large: {size_str} > {max_str}")
-                
-        except OSError as e:
-            return UploadResult(success=False, error_message=f"Cannot access file: {e}")
-        
+        max_size = get_max_file_size(file_path)
+
+        if size == 0:
+            return UploadResult(success=True, skip_reason="Empty file")
+
+        if size > max_size:
+            size_str = self._format_size(size)
+            max_str = self._format_size(max_size)
+            return UploadResult(success=True, skip_reason=f"File too large: {size_str} > {max_str}")
+
         return UploadResult(success=True)
     
     def _upload_bytes(self, file_path: str, retries: int = MAX_RETRIES) -> Optional[str]:
@@ -154,109 +338,136 @@ class MediaUploader:
         Upload file bytes to Google Photos.
         Returns upload token if successful, None otherwise.
         """
+        # Invariant across attempts: encode the filename once, not per retry
+        # (use UTF-8 and URL encode so it survives HTTP headers)
+        filename = os.path.basename(file_path)
+        encoded_filename = urllib.parse.quote(filename.encode('utf-8'))
+        try:
+            file_size = os.path.getsize(file_path)
+        except OSError as e:
+            logger.error(f"Cannot stat {file_path}: {e}")
+            return None
+
+        # Create the upload URL
+        upload_url = "https://photoslibrary.googleapis.com/v1/uploads"
+
+        # Every header but Authorization is invariant across attempts —
+        # build the dict once and refresh only the token slot per retry
+        headers = {
+            'Authorization': '',
+            'Content-type': 'application/octet-stream',
+            'Content-Length': str(file_size),
+            'X-Goog-Upload-File-Name': encoded_filename,
+            'X-Goog-Upload-Protocol': 'raw',
+        }
+
         for attempt in range(retries + 1):
             try:
-                logger.debug(f"Uploading bytes for {file_path} (attempt {attempt + 1})")
-                
-                # Determine MIME type
-                mime_type = self._get_mime_type(file_path)
-                
-                # Create the upload URL
-                upload_url = "https://photoslibrary.googleapis.com/v1/uploads"
-                
-                # Refresh token if needed
-                if self.service._http.credentials.expired:
-                    logger.debug("Token expired, refreshing...")
-                    try:
-                        from google.auth.transport.requests import Request
-                        self.service._http.credentials.refresh(Request())
-                        logger.debug("Token refreshed successfully")
-                    except Exception as e:
-                        logger.error(f"Failed to refresh token: {e}")
-                        return None
-                
-                # Prepare headers
-                # Encode filename properly for HTTP headers (use UTF-8 and URL encode)
-                filename = os.path.basename(file_path)
-                encoded_filename = urllib.parse.quote(filename.encode('utf-8'))
-                
-                headers = {
-                    'Authorization': f'Bearer {self.service._http.credentials.token}',
-                    'Content-type': 'application/octet-stream',
-                    'X-Goog-Upload-File-Name': encoded_filename,
-                    'X-Goog-Upload-Protocol': 'raw',
-                }
-                
-                # Upload file data
+                # %-style args: logging skips the format (and the token
+                # slice below) entirely when DEBUG is off
+                logger.debug("Uploading bytes for %s (attempt %d)", file_path, attempt + 1)
+
+                # Refresh token if needed (deduplicated across workers)
+                if not self._ensure_fresh_token():
+                    return None
+
+                # Re-read per attempt: a 401 refresh changes the token
+                headers['Authorization'] = f'Bearer {self.service._http.credentials.token}'
+
+                # Upload file data (counts toward the per-minute write limit).
+                # Passing the open handle streams the body from disk in
+                # chunks — the file is never materialized as one bytes
+                # object in memory. Reopened per attempt so retries restart
+                # from the beginning.
+                self.quota.acquire()
                 with open(file_path, 'rb') as f:
-                    response = requests.post(upload_url, headers=headers, data=f)
+                    # One sequential pass over the file: tell the kernel
+                    # so readahead ramps up immediately instead of after
+                    # the first few reads (POSIX only; best-effort)
+                    if hasattr(os, 'posix_fadvise'):
+                        try:
+                            os.posix_fadvise(f.fileno(), 0, 0,
+                                             os.POSIX_FADV_SEQUENTIAL)
+                        except OSError:
+                            pass
+                    response = self._session.post(upload_url, headers=headers, data=f)
                 
                 # Note: Bytes upload doesn't count toward Google Photos API quota
                 # Only the batchCreate call counts
                 
                 if response.status_code == 200:
                     upload_token = response.text
-                    logger.debug(f"Successfully uploaded bytes, token: {upload_token[:20]}...")
+                    logger.debug("Successfully uploaded bytes, token: %.20s...", upload_token)
                     return upload_token
                 elif response.status_code == 429:  # Rate limit
-                    wait_time = RETRY_DELAY * (BACKOFF_FACTOR ** attempt)
-                    logger.warning(f"Rate limited uploading bytes, waiting {wait_time}s...")
-                    time.sleep(wait_time)
+                    logger.warning("Rate limited uploading bytes, backing off...")
+                    self._sleep_rate_limited(attempt, response.headers.get('Retry-After'))
                 elif response.status_code == 401:  # Authentication error
                     logger.warning(f"Authentication error (attempt {attempt + 1}), trying to refresh token...")
-                    try:
-                        from google.auth.transport.requests import Request
-                        self.service._http.credentials.refresh(Request())
-                        logger.info("Token refreshed due to 401 error")
-                        # Don't sleep, just retry immediately with new token
-                    except Exception as e:
-                        logger.error(f"Failed to refresh token after 401 error: {e}")
-                        if attempt < retries:
-                            wait_time = RETRY_DELAY * (BACKOFF_FACTOR ** attempt)
-                            time.sleep(wait_time)
+                    # A 401 means the token is bad regardless of what the
+                    # freshness deadline claims — force a refresh under
+                    # the lock (sleep outside it so waiters aren't held up)
+                    refreshed = False
+                    with self._refresh_lock:
+                        try:
+                            from google.auth.transport.requests import Request
+                            self.service._http.credentials.refresh(Request())
+                            self._token_fresh_until = (time.monotonic()
+                                                       + _TOKEN_FRESH_SECONDS)
+                            logger.info("Token refreshed due to 401 error")
+                            refreshed = True
+                        except Exception as e:
+                            self._token_fresh_until = 0.0
+                            logger.error(f"Failed to refresh token after 401 error: {e}")
+                    # Retry immediately with the new token; back off only
+                    # if the refresh itself failed
+                    if not refreshed and attempt < retries:
+                        self._sleep_backoff(attempt)
                 else:
                     logger.error(f"Upload bytes failed: {response.status_code} - {response.text}")
                     if attempt < retries:
-                        wait_time = RETRY_DELAY * (BACKOFF_FACTOR ** attempt)
-                        time.sleep(wait_time)
+                        self._sleep_backoff(attempt)
                     
             except Exception as e:
                 logger.error(f"Error uploading bytes (attempt {attempt + 1}): {e}")
                 if attempt < retries:
-                    wait_time = RETRY_DELAY * (BACKOFF_FACTOR ** attempt)
-                    time.sleep(wait_time)
+                    self._sleep_backoff(attempt)
         
         logger.error(f"Failed to upload bytes for {file_path} after {retries + 1} attempts")
         return None
     
-    def _create_media_item(self, file_path: str, upload_token: str, 
-                          album_id: Optional[str] = None, retries: int = MAX_RETRIES) -> Optional[str]:
+    def _create_media_item(self, file_path: str, upload_token: str,
+                          album_id: Optional[str] = None, retries: int = MAX_RETRIES,
+                          filename: Optional[str] = None) -> Optional[str]:
         """
         Create a media item from uploaded bytes.
+        Callers that already have the basename pass it in; the request
+        body is invariant across attempts, so build it once.
         Returns media item ID if successful, None otherwise.
         """
+        if filename is None:
+            filename = os.path.basename(file_path)
+        new_media_item = {
+            'description': filename,
+            'simpleMediaItem': {
+                'uploadToken': upload_token,
+                'fileName': filename
+            }
+        }
+
+        request_body = {
+            'newMediaItems': [new_media_item]
+        }
+
+        # If album_id is provided, add it to the request
+        if album_id:
+            request_body['albumId'] = album_id
+
         for attempt in range(retries + 1):
             try:
-                logger.debug(f"Creating media item for {file_path} (attempt {attempt + 1})")
-                
-                # Prepare the request body
-                filename = os.path.basename(file_path)
-                new_media_item = {
-                    'description': filename,
-                    'simpleMediaItem': {
-                        'uploadToken': upload_token,
-                        'fileName': filename
-                    }
-                }
-                
-                request_body = {
-                    'newMediaItems': [new_media_item]
-                }
-                
-                # If album_id is provided, add it to the request
-                if album_id:
-                    request_body['albumId'] = album_id
-                
+                logger.debug("Creating media item for %s (attempt %d)", file_path, attempt + 1)
+
+                self.quota.acquire()
                 response = self.service.mediaItems().batchCreate(body=request_body).execute()
                 
                 # Record the API request
@@ -277,7 +488,7 @@ class MediaUploader:
                             media_item = result.get('mediaItem', {})
                             media_item_id = media_item.get('id')
                             if media_item_id:
-                                logger.debug(f"Successfully created media item: {media_item_id}")
+                                logger.debug("Successfully created media item: %s", media_item_id)
                                 return media_item_id
                         else:
                             error_msg = status.get('message', 'Unknown error')
@@ -287,65 +498,137 @@ class MediaUploader:
                 
             except HttpError as e:
                 if e.resp.status == 429:  # Rate limit
-                    wait_time = RETRY_DELAY * (BACKOFF_FACTOR ** attempt)
-                    logger.warning(f"Rate limited creating media item, waiting {wait_time}s...")
-                    time.sleep(wait_time)
+                    logger.warning("Rate limited creating media item, backing off...")
+                    self._sleep_rate_limited(
+                        attempt, e.resp.get('retry-after') or e.resp.get('Retry-After'))
                 else:
                     logger.error(f"HTTP error creating media item (attempt {attempt + 1}): {e}")
                     if attempt < retries:
-                        wait_time = RETRY_DELAY * (BACKOFF_FACTOR ** attempt)
-                        time.sleep(wait_time)
+                        self._sleep_backoff(attempt)
                         
             except Exception as e:
                 logger.error(f"Error creating media item (attempt {attempt + 1}): {e}")
                 if attempt < retries:
-                    wait_time = RETRY_DELAY * (BACKOFF_FACTOR ** attempt)
-                    time.sleep(wait_time)
+                    self._sleep_backoff(attempt)
         
         logger.error(f"Failed to create media item for {file_path} after {retries + 1} attempts")
         return None
     
+    def _flush_media_batch(self, pending: List[Tuple[str, str]],
+                           album_id: Optional[str] = None,
+                           retries: int = MAX_RETRIES,
+                           file_hashes: Optional[Dict[str, str]] = None) -> Tuple[int, int]:
+        """
+        Create media items for up to MEDIA_BATCH_SIZE uploaded byte tokens in
+        a single batchCreate call — one quota unit for the whole batch
+        instead of one per file.
+
+        Args:
+            pending: list of (file_path, upload_token) pairs, in order
+            album_id: optional album to create the items in
+
+        Returns:
+            Tuple of (uploaded_count, failed_count)
+        """
+        if not pending:
+            return 0, 0
+
+        # One basename per file, shared by both body fields
+        basenames = [os.path.basename(file_path) for file_path, _ in pending]
+        request_body = {
+            'newMediaItems': [
+                {
+                    'description': filename,
+                    'simpleMediaItem': {
+                        'uploadToken': upload_token,
+                        'fileName': filename
+                    }
+                }
+                for (_, upload_token), filename in zip(pending, basenames)
+            ]
+        }
+        if album_id:
+            request_body['albumId'] = album_id
+
+        response = None
+        for attempt in range(retries + 1):
+            try:
+                logger.debug("batchCreate for %d files (attempt %d)", len(pending), attempt + 1)
+                self.quota.acquire()
+                response = self.service.mediaItems().batchCreate(body=request_body).execute()
+
+                # One request for the whole batch
+                if not self.quota.record_requests(1):
+                    logger.error("Quota exhausted during batch media item creation")
+                break
+
+            except HttpError as e:
+                if e.resp.status == 429:  # Rate limit
+                    logger.warning("Rate limited on batchCreate, backing off...")
+                    self._sleep_rate_limited(
+                        attempt, e.resp.get('retry-after') or e.resp.get('Retry-After'))
+                else:
+                    logger.error(f"HTTP error on batchCreate (attempt {attempt + 1}): {e}")
+                    if attempt < retries:
+                        self._sleep_backoff(attempt)
+
+            except Exception as e:
+                logger.error(f"Error on batchCreate (attempt {attempt + 1}): {e}")
+                if attempt < retries:
+                    self._sleep_backoff(attempt)
+
+        uploaded = 0
+        failed = 0
+
+        if response is None:
+            logger.error(f"batchCreate failed for all {len(pending)} files after {retries + 1} attempts")
+            for file_path, _ in pending:
+                self.state.mark_file_failed(file_path, "batchCreate request failed")
+            return 0, len(pending)
+
+        # Results come back in request order, so pair them with the files
+        results = response.get('newMediaItemResults', [])
+        succeeded = []
+        for (file_path, _), filename, result in zip(pending, basenames, results):
+            status = result.get('status', {})
+            is_success = (status.get('code') == 0 or
+                          status.get('message') == 'Success' or
+                          'mediaItem' in result)
+            media_item_id = result.get('mediaItem', {}).get('id')
+
+            if is_success and media_item_id:
+                succeeded.append((
+                    file_path, media_item_id, album_id,
+                    file_hashes.get(file_path) if file_hashes else None
+                ))
+                uploaded += 1
+                safe_log('info', f"✅ Successfully uploaded: {filename}")
+            else:
+                error_msg = status.get('message', 'Unknown error')
+                logger.error(f"Failed to create media item for {filename}: {error_msg}")
+                self.state.mark_file_failed(file_path, f"batchCreate: {error_msg}")
+                failed += 1
+
+        # One state update + journal line for the whole batch
+        self.state.mark_files_uploaded_bulk(succeeded)
+
+        # Anything past the end of the results list never got an answer
+        for file_path, _ in pending[len(results):]:
+            self.state.mark_file_failed(file_path, "batchCreate: no result returned")
+            failed += 1
+
+        return uploaded, failed
+
     def _get_mime_type(self, file_path: str) -> str:
         """Get MIME type for a file"""
         extension = os.path.splitext(file_path)[1].lower()
-        
-        # Image MIME types
-        if extension in ['.jpg', '.jpeg']:
-            return 'image/jpeg'
-        elif extension == '.png':
-            return 'image/png'
-        elif extension == '.gif':
-            return 'image/gif'
-        elif extension == '.bmp':
-            return 'image/bmp'
-        elif extension == '.webp':
-            return 'image/webp'
-        elif extension in ['.heic', '.heif']:
-            return 'image/heic'
-        
-        # Video MIME types
-        elif extension == '.mp4':
-            return 'video/mp4'
-        elif extension == '.mov':
-            return 'video/quicktime'
-        elif extension == '.avi':
-            return 'video/x-msvideo'
-        elif extension == '.mkv':
-            return 'video/x-matroska'
-        elif extension == '.m4v':
-            return 'video/x-m4v'
-        elif extension == '.webm':
-            return 'video/webm'
-        elif extension == '.3gp':
-            return 'video/3gpp'
-        
-        # Default
-        return 'application/octet-stream'
+        return _MIME_TYPES.get(extension, 'application/octet-stream')
     
-    def _format_file_size(self, file_path: str) -> str:
-        """Format file size for display"""
+    def _format_file_size(self, file_path: str, size: Optional[int] = None) -> str:
+        """Format file size for display (uses a cached size if given)"""
         try:
-            size = os.path.getsize(file_path)
+            if size is None:
+                size = os.path.getsize(file_path)
             return self._format_size(size)
         except:
             return "unknown size"
@@ -374,59 +657,141 @@ class MediaUploader:
         failed_count = 0
         
         try:
-            # Get all files in directory
-            if not os.path.exists(directory_path) or not os.path.isdir(directory_path):
+            # Get all files in directory (one stat answers both the
+            # exists and isdir questions)
+            try:
+                if not stat_module.S_ISDIR(os.stat(directory_path).st_mode):
+                    safe_log('error', f"Not a directory: {directory_path}")
+                    return 0, 0, 1
+            except OSError:
                 safe_log('error', f"Directory does not exist: {directory_path}")
                 return 0, 0, 1
             
-            files = []
+            # scandir hands back ready-made paths and cached file types —
+            # no per-entry os.path.join or isfile() stat needed. The size
+            # is grabbed here too, so validation and progress logging
+            # don't re-stat every file.
+            files = 0
+            supported_files: List[Tuple[str, int]] = []  # (path, size)
             try:
-                for filename in os.listdir(directory_path):
-                    file_path = os.path.join(directory_path, filename)
-                    if os.path.isfile(file_path):
-                        files.append(file_path)
+                with os.scandir(directory_path) as entries:
+                    for entry in entries:
+                        if entry.is_file(follow_symlinks=False):
+                            files += 1
+                            if is_supported_file(entry.name):
+                                supported_files.append(
+                                    (entry.path,
+                                     entry.stat(follow_symlinks=False).st_size))
             except PermissionError:
                 safe_log('error', f"Permission denied accessing directory: {directory_path}")
                 return 0, 0, 1
-            
-            # Filter to supported files
-            supported_files = [f for f in files if is_supported_file(f)]
-            
+
             if not supported_files:
                 safe_log('info', f"No supported media files found in: {directory_path}")
-                return 0, len(files), 0
+                return 0, files, 0
             
             safe_log('info', f"Found {len(supported_files)} supported files in: {directory_path}")
-            
-            # Set directory file count for progress tracking
-            self.set_current_directory_files(len(supported_files))
-            
-            # Upload each file
-            for file_path in supported_files:
+
+            # Directory progress counters stay local to this call: with
+            # several directory workers sharing one uploader, the old
+            # instance attributes interleaved and the remaining counts
+            # drifted across directories
+            directory_files = len(supported_files)
+            directory_uploaded = 0
+
+            # First pass: validation, skip, and quota bookkeeping (cheap,
+            # sequential); collect the files that actually need uploading
+            to_upload: List[str] = []
+            file_hashes: Dict[str, str] = {}  # only filled with --dedup-by-content
+            # Local binding: on a resume of a mostly-done backup this
+            # runs once per already-uploaded file
+            is_uploaded = self.state.is_file_uploaded
+            for file_path, file_size in supported_files:
                 # Check if we can continue (quota check)
                 can_continue, reason = self.quota.can_perform_operation("upload_file")
                 if not can_continue:
                     logger.warning(f"Stopping uploads: {reason}")
                     self.state.set_stop_reason(reason)
                     break
-                
-                result = self.upload_file(file_path, album_id)
+
                 self.state.increment_files_processed()
-                
-                if result.success:
-                    if result.skip_reason:
-                        logger.debug(f"Skipped {os.path.basename(file_path)}: {result.skip_reason}")
-                        skipped_count += 1
-                    else:
-                        uploaded_count += 1
-                else:
-                    logger.error(f"Failed to upload {os.path.basename(file_path)}: {result.error_message}")
-                    self.state.mark_file_failed(file_path, result.error_message or "Unknown error")
+
+                validation = self._validate_file(file_path, size=file_size)
+                if not validation.success:
+                    logger.error(f"Failed to upload {os.path.basename(file_path)}: {validation.error_message}")
+                    self.state.mark_file_failed(file_path, validation.error_message or "Unknown error")
                     failed_count += 1
-                
-                # Save state after each file
-                self.state.save_state()
-            
+                    continue
+                if validation.skip_reason:
+                    logger.debug("Skipped %s: %s", os.path.basename(file_path), validation.skip_reason)
+                    skipped_count += 1
+                    continue
+
+                # One dedup probe per file, shared with the progress line
+                already_uploaded = is_uploaded(file_path)
+                self._log_progress(file_path, size=file_size,
+                                   already_uploaded=already_uploaded,
+                                   directory_files=directory_files,
+                                   directory_uploaded=directory_uploaded)
+
+                if already_uploaded:
+                    directory_uploaded += 1
+                    logger.debug("File already uploaded, skipped: %s", file_path)
+                    skipped_count += 1
+                    continue
+
+                if self.dedup_by_content:
+                    content_hash = compute_content_hash(file_path)
+                    if content_hash:
+                        # Same bytes uploaded before (possibly from another
+                        # path): record this path against the existing media
+                        # item instead of re-uploading
+                        existing_id = self.state.get_media_id_for_hash(content_hash)
+                        if existing_id:
+                            self.state.mark_file_uploaded(file_path, existing_id,
+                                                          content_hash=content_hash)
+                            directory_uploaded += 1
+                            logger.debug("Duplicate content, skipped upload: %s", file_path)
+                            skipped_count += 1
+                            continue
+                        file_hashes[file_path] = content_hash
+
+                to_upload.append(file_path)
+
+            # Second pass: byte uploads are pure network waits, so keep
+            # them in flight on the shared executor (one per uploader —
+            # concurrent directory calls share its pool_size workers, so
+            # in-flight POSTs never exceed the session's connection pool).
+            # map() preserves order, so tokens pair with files and batches
+            # flush on this thread while workers keep uploading. Media item
+            # creation still batches up to MEDIA_BATCH_SIZE per request.
+            pending: List[Tuple[str, str]] = []  # (file_path, upload_token)
+            if to_upload:
+                for file_path, upload_token in zip(to_upload, self._upload_pool.map(self._upload_bytes, to_upload)):
+                    if not upload_token:
+                        logger.error(f"Failed to upload {os.path.basename(file_path)}: byte upload failed")
+                        self.state.mark_file_failed(file_path, "Failed to upload file bytes")
+                        failed_count += 1
+                        continue
+
+                    pending.append((file_path, upload_token))
+
+                    if len(pending) >= MEDIA_BATCH_SIZE:
+                        # Per-file results land in the state journal as
+                        # they're marked, so no full save is needed here
+                        batch_uploaded, batch_failed = self._flush_media_batch(
+                            pending, album_id, file_hashes=file_hashes)
+                        uploaded_count += batch_uploaded
+                        failed_count += batch_failed
+                        pending = []
+
+            # Flush any remainder for this directory
+            if pending:
+                batch_uploaded, batch_failed = self._flush_media_batch(
+                    pending, album_id, file_hashes=file_hashes)
+                uploaded_count += batch_uploaded
+                failed_count += batch_failed
+
             logger.info(f"Directory upload complete: {uploaded_count} uploaded, {skipped_count} skipped, {failed_count} failed")
             return uploaded_count, skipped_count, failed_count
             
@@ -440,19 +805,22 @@ def get_directory_media_count(directory_path: str) -> Tuple[int, int]:
     Returns (total_files, supported_files)
     """
     try:
-        if not os.path.exists(directory_path) or not os.path.isdir(directory_path):
+        try:
+            if not stat_module.S_ISDIR(os.stat(directory_path).st_mode):
+                return 0, 0
+        except OSError:
             return 0, 0
         
         total_files = 0
         supported_files = 0
-        
-        for filename in os.listdir(directory_path):
-            file_path = os.path.join(directory_path, filename)
-            if os.path.isfile(file_path):
-                total_files += 1
-                if is_supported_file(file_path):
-                    supported_files += 1
-        
+
+        with os.scandir(directory_path) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    total_files += 1
+                    if is_supported_file(entry.name):
+                        supported_files += 1
+
         return total_files, supported_files
         
     except Exception as e: